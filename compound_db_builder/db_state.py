@@ -5,11 +5,13 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Iterable
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 
 
-def _norm(s: object) -> str:
-    return str(s).strip().lower()
+def _trimmed_strings(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    return pc.utf8_trim_whitespace(pc.cast(col, pa.string()))
 
 
 def load_parquet_known(
@@ -18,31 +20,30 @@ def load_parquet_known(
     """
     Return (known_names_lower, known_cids_str).
 
-    - known_names_lower from "PubChem Name"
+    - known_names_lower from "PubChem Name" (rows that have a CID)
     - known_cids_str from "PubChem CID" (normalized string, no trailing .0)
     """
     if not parquet_path.is_file():
         return set(), set()
 
-    df = pd.read_parquet(parquet_path)
+    # Only decode the two columns we need, and skip rows without a CID at scan time
+    dataset = ds.dataset(parquet_path, format="parquet")
+    wanted = [c for c in ("PubChem Name", "PubChem CID") if c in dataset.schema.names]
+    row_filter = ds.field("PubChem CID").is_valid() if "PubChem CID" in wanted else None
+    tbl = dataset.to_table(columns=wanted, filter=row_filter)
+
     known_names: set[str] = set()
     known_cids: set[str] = set()
 
-    if "PubChem Name" in df.columns:
-        known_names = {
-            _norm(x) for x in df["PubChem Name"].dropna().astype(str).tolist() if _norm(x)
-        }
-
-    if "PubChem CID" in df.columns:
-        cids = (
-            df["PubChem CID"]
-            .dropna()
-            .astype(str)
-            .str.strip()
-            .str.replace(r"\.0$", "", regex=True)
-            .tolist()
+    if "PubChem Name" in wanted:
+        names = pc.utf8_lower(_trimmed_strings(tbl.column("PubChem Name")))
+        known_names = {n for n in names.to_pylist() if n}
+
+    if "PubChem CID" in wanted:
+        cids = pc.replace_substring_regex(
+            _trimmed_strings(tbl.column("PubChem CID")), pattern=r"\.0$", replacement=""
         )
-        known_cids = {c for c in cids if c and c.lower() != "none"}
+        known_cids = {c for c in cids.to_pylist() if c and c.lower() != "none"}
 
     return known_names, known_cids
 
@@ -6,17 +6,76 @@ import json
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
 
-def write_json(path: str | Path, obj: Any) -> Path:
+
+def write_json(path: str | Path, obj: Any, *, indent: bool = True) -> Path:
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        path.write_bytes(orjson.dumps(obj, option=option))
+    else:
+        text = json.dumps(obj, indent=2 if indent else None, ensure_ascii=False)
+        path.write_text(text, encoding="utf-8")
     return path
 
 
 def read_json(path: str | Path) -> Any:
+    return _loads(Path(path).read_bytes())
+
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # older files may contain bare NaN tokens (stdlib json), which orjson rejects
+            pass
+    return json.loads(data.decode("utf-8"))
+
+
+def json_line(obj: Any) -> bytes:
+    """One compact JSON document terminated by a newline (NDJSON)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def read_ndjson_lines(path: str | Path) -> list[tuple[bytes, Any]]:
+    """
+    (raw line, parsed document) for each complete line of an NDJSON file ([] if missing).
+    A last line without its newline (interrupted write) and unparsable lines are dropped.
+    """
+    path = Path(path)
+    if not path.is_file():
+        return []
+    data = path.read_bytes()
+    lines = data.splitlines()
+    if lines and not data.endswith(b"\n"):
+        lines.pop()
+
+    out: list[tuple[bytes, Any]] = []
+    for line in lines:
+        try:
+            out.append((line, _loads(line)))
+        except ValueError:
+            continue
+    return out
+
+
+def write_json_from_ndjson(path: str | Path, ndjson_path: str | Path) -> Path:
+    """Write the NDJSON documents of ndjson_path as one JSON list (no re-parsing)."""
     path = Path(path)
-    return json.loads(path.read_text(encoding="utf-8"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = Path(ndjson_path).read_bytes().splitlines()
+    path.write_bytes(b"[\n" + b",\n".join(lines) + b"\n]")
+    return path
 
 
 def write_json_list(path: str | Path, items: list[str]) -> Path:
@@ -25,21 +84,16 @@ def write_json_list(path: str | Path, items: list[str]) -> Path:
 
 def read_json_list(path: str | Path) -> list[str]:
     data = read_json(path)
-    if not isinstance(data, list) or not all(isinstance(x, str) for x in data):
+    # set(map(type, ...)) checks every item in one C-level pass (no per-item generator frame)
+    if not isinstance(data, list) or not set(map(type, data)) <= {str}:
         raise ValueError(f"Expected a JSON list[str] at {path}")
     return data
 
 
 def dedupe_preserve_order(items: list[str]) -> list[str]:
-    seen: set[str] = set()
-    out: list[str] = []
-    for s in items:
-        s = str(s).strip()
-        if not s:
-            continue
-        key = s.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(s)
-    return out
+    """Drop empty and case-insensitive duplicate entries, keeping the first spelling."""
+    first: dict[str, str] = {}
+    for s in map(str.strip, map(str, items)):
+        if s:
+            first.setdefault(s.lower(), s)
+    return list(first.values())
@@ -4,81 +4,123 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
-from io_json import write_json
+from io_json import read_json, write_json
 
+# Arrow-backed strings: native string kernels, no per-element Python objects
+_STRING = "string[pyarrow]"
 
-def _norm_cid(v: object) -> str | None:
-    if v is None:
-        return None
-    s = str(v).strip()
-    if not s:
-        return None
-    s = s.replace(".0", "") if s.endswith(".0") else s
-    if s.lower() == "none":
-        return None
-    return s
+
+def norm_cid_series(cids: pd.Series) -> pd.Series:
+    """
+    Clean CIDs to plain strings (trimmed, no trailing .0); ""/"none" -> <NA>.
+    """
+    arr = pa.array(cids.astype(_STRING))
+    arr = pc.replace_substring_regex(pc.utf8_trim_whitespace(arr), pattern=r"\.0$", replacement="")
+    keep = pc.and_(pc.not_equal(arr, ""), pc.not_equal(pc.utf8_lower(arr), "none"))
+    arr = pc.if_else(keep, arr, pa.scalar(None, type=arr.type))
+    return pd.Series(pd.arrays.ArrowStringArray(arr), index=cids.index, name=cids.name)
 
 
-def _not_empty(v: object) -> bool:
-    if v is None:
-        return False
-    s = str(v).strip()
-    return bool(s) and s.lower() != "nan"
+def _present(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Boolean mask of non-empty values (None/NaN/"" / "nan" count as empty)."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    s = df[col].astype(_STRING).fillna("").str.strip()
+    return (s.ne("") & s.str.lower().ne("nan")).to_numpy(dtype=bool)
 
 
-def _score_row(row: pd.Series) -> int:
+def _score_frame(df: pd.DataFrame) -> np.ndarray:
     """
-    Higher score = better.
+    Higher score = better (one score per row).
     We prefer:
       - Status ok
       - has CID
       - has Name / Formula / MW / SMILES
     """
-    score = 0
-    if str(row.get("Status", "")).strip().lower() == "ok":
-        score += 10_000
+    score = np.zeros(len(df), dtype=np.int32)
 
-    if _norm_cid(row.get("PubChem CID")):
-        score += 2_000
-
-    if _not_empty(row.get("PubChem Name")):
-        score += 400
-    if _not_empty(row.get("Molecular Formula")):
-        score += 400
-    if _not_empty(row.get("Molecular Weight")):
-        score += 400
-    if _not_empty(row.get("SMILES")):
-        score += 50
+    if "Status" in df.columns:
+        status = df["Status"].astype(_STRING).fillna("").str.strip().str.lower()
+        score += status.eq("ok").to_numpy(dtype=bool) * 10_000
+
+    if "PubChem CID" in df.columns:
+        cid = (
+            df["PubChem CID"]
+            .astype(_STRING)
+            .fillna("")
+            .str.strip()
+            .str.replace(r"\.0$", "", regex=True)
+        )
+        has_cid = cid.ne("") & cid.str.lower().ne("none")
+        score += has_cid.to_numpy(dtype=bool) * 2_000
+
+    score += _present(df, "PubChem Name") * 400
+    score += _present(df, "Molecular Formula") * 400
+    score += _present(df, "Molecular Weight") * 400
+    score += _present(df, "SMILES") * 50
 
     return score
 
 
+def _best_row_per_key(df: pd.DataFrame, key: pd.Series, score: np.ndarray) -> pd.DataFrame:
+    """
+    Keep the highest-scoring row per key, ordered by key.
+    On equal scores the later row wins (scanned in reverse, idxmax takes the first max).
+    """
+    df = df.reset_index(drop=True)
+    key = key.reset_index(drop=True)
+    score_s = pd.Series(score, index=df.index)
+    best = score_s.iloc[::-1].groupby(key.iloc[::-1], dropna=False).idxmax()
+    return df.loc[best.to_numpy()].reset_index(drop=True)
+
+
+def _arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    cols = df.select_dtypes(include="object").columns
+    return df.astype({c: _STRING for c in cols}) if len(cols) else df
+
+
+def _read_cache_records(cache_path: Path) -> list[dict]:
+    if not cache_path.is_file():
+        return []
+    records = read_json(cache_path)
+    return records if isinstance(records, list) else []
+
+
 def load_cache(cache_path: Path) -> tuple[pd.DataFrame, set[str]]:
     """
     Load ALL call outcomes (success + failure).
     Returns (df_cache, attempted_query_lower_set).
     """
-    if not cache_path.is_file():
+    records = _read_cache_records(cache_path)
+    if not records:
         return pd.DataFrame(), set()
 
-    df = pd.read_json(cache_path)
-    if df.empty or "Query Name" not in df.columns:
-        return df, set()
+    attempted = {
+        str(q).strip().lower()
+        for q in (r.get("Query Name") for r in records)
+        if q is not None
+    }
+    return _arrow_strings(pd.DataFrame.from_records(records)), attempted
 
-    attempted = set(
-        df["Query Name"].dropna().astype(str).str.strip().str.lower().tolist()
-    )
-    return df, attempted
+
+def _json_column(s: pd.Series) -> list[object]:
+    # every missing marker (NaN included) becomes None, so both JSON writers emit null
+    return s.astype(object).where(s.notna(), None).tolist()
 
 
 def save_cache(cache_path: Path, df: pd.DataFrame) -> Path:
     """
-    Persist cache as JSON with NaN -> None (so JSON uses null).
+    Persist cache as compact JSON with missing values -> null.
     """
-    records = df.where(pd.notna(df), None).to_dict(orient="records")
-    return write_json(cache_path, records)
+    cols = list(df.columns)
+    values = [_json_column(df[c]) for c in cols]
+    records = [dict(zip(cols, row, strict=True)) for row in zip(*values, strict=True)]
+    return write_json(cache_path, records, indent=False)
 
 
 def merge_cache(df_cached: pd.DataFrame, df_new: pd.DataFrame, cache_path: Path) -> pd.DataFrame:
@@ -86,9 +128,9 @@ def merge_cache(df_cached: pd.DataFrame, df_new: pd.DataFrame, cache_path: Path)
     Merge cached + new call records, keep BEST record per Query Name.
     """
     if df_cached is None or df_cached.empty:
-        df_all = df_new.copy() if df_new is not None else pd.DataFrame()
+        df_all = df_new if df_new is not None else pd.DataFrame()
     elif df_new is None or df_new.empty:
-        df_all = df_cached.copy()
+        df_all = df_cached
     else:
         df_all = pd.concat([df_cached, df_new], ignore_index=True)
 
@@ -96,15 +138,9 @@ def merge_cache(df_cached: pd.DataFrame, df_new: pd.DataFrame, cache_path: Path)
         save_cache(cache_path, df_all if df_all is not None else pd.DataFrame())
         return df_all
 
-    df_all = df_all.copy()
-    df_all["Query Name"] = df_all["Query Name"].astype(str).str.strip()
-    df_all["_qkey"] = df_all["Query Name"].str.lower()
-    df_all["_score"] = df_all.apply(_score_row, axis=1)
-    df_all["_idx"] = range(len(df_all))  # stable tie-break
-
-    df_all = df_all.sort_values(by=["_qkey", "_score", "_idx"], ascending=[True, False, False])
-    df_all = df_all.drop_duplicates(subset=["_qkey"], keep="first")
-    df_all = df_all.drop(columns=["_qkey", "_score", "_idx"]).reset_index(drop=True)
+    df_all = _arrow_strings(df_all)
+    df_all = df_all.assign(**{"Query Name": df_all["Query Name"].astype(_STRING).str.strip()})
+    df_all = _best_row_per_key(df_all, df_all["Query Name"].str.lower(), _score_frame(df_all))
 
     save_cache(cache_path, df_all)
     return df_all
@@ -118,16 +154,17 @@ def successful_only(df_calls: pd.DataFrame) -> pd.DataFrame:
     if df_calls is None or df_calls.empty:
         return pd.DataFrame()
 
-    df = df_calls.copy()
+    df = df_calls
 
     if "Status" in df.columns:
-        df = df[df["Status"].astype(str).str.strip().str.lower().eq("ok")].copy()
+        ok = df["Status"].astype(_STRING).str.strip().str.lower().eq("ok").fillna(False)
+        df = df.loc[ok]
 
     if "PubChem CID" not in df.columns:
         return pd.DataFrame()
 
-    df["PubChem CID"] = df["PubChem CID"].apply(_norm_cid)
-    df = df[df["PubChem CID"].notna()].copy()
+    cid = norm_cid_series(df["PubChem CID"])
+    df = df.loc[cid.notna()].assign(**{"PubChem CID": cid[cid.notna()]})
 
     return df.reset_index(drop=True)
 
@@ -139,12 +176,4 @@ def best_per_cid(df_ok: pd.DataFrame) -> pd.DataFrame:
     if df_ok is None or df_ok.empty:
         return pd.DataFrame()
 
-    df = df_ok.copy()
-    df["_score"] = df.apply(_score_row, axis=1)
-    df["_idx"] = range(len(df))
-
-    df = df.sort_values(by=["PubChem CID", "_score", "_idx"], ascending=[True, False, False])
-    df = df.drop_duplicates(subset=["PubChem CID"], keep="first")
-    df = df.drop(columns=["_score", "_idx"]).reset_index(drop=True)
-
-    return df
+    return _best_row_per_key(df_ok, df_ok["PubChem CID"], _score_frame(df_ok))
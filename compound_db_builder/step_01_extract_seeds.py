@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import json
-import re
 from pathlib import Path
 from typing import Any
 
@@ -11,6 +10,13 @@ import pandas as pd
 
 from io_json import dedupe_preserve_order, write_json_list
 
+# Arrow-backed strings: native string kernels, no per-element Python objects
+_STRING = "string[pyarrow]"
+
+# Patterns run by Arrow's regex engine (plain strings, not re.Pattern)
+_KEGG_PREFIX_PAT = r"^[GC]\d+\s+"
+_PAREN_PAT = r"\s*\(.*?\)"
+
 
 def seed_list_from_initial_xlsx(xlsx_path: str | Path, name_column: str = "Name") -> list[str]:
     xlsx_path = Path(xlsx_path)
@@ -41,7 +47,7 @@ def seed_list_from_bio_roles_json(json_path: str | Path) -> list[str]:
         "Antibiotics",
     }
 
-    names: list[str] = []
+    leaves: list[str] = []
 
     def traverse(node: dict[str, Any]) -> None:
         name = node.get("name")
@@ -54,19 +60,17 @@ def seed_list_from_bio_roles_json(json_path: str | Path) -> list[str]:
                 traverse(child)
             return
 
-        if not name:
-            return
+        if name:
+            leaves.append(str(name))
 
-        raw = str(name).strip()
-        raw = re.sub(r"^[GC]\d+\s+", "", raw)        # remove KEGG-like id prefix
-        raw = re.sub(r"\s*\(.*?\)", "", raw).strip() # remove parentheses blocks
-        preferred = raw.split(";")[-1].strip()       # keep last alias
+    traverse(data)
 
-        if preferred:
-            names.append(preferred)
+    raw = pd.Series(leaves, dtype=_STRING).str.strip()
+    raw = raw.str.replace(_KEGG_PREFIX_PAT, "", regex=True)         # remove KEGG-like id prefix
+    raw = raw.str.replace(_PAREN_PAT, "", regex=True).str.strip()   # remove parentheses blocks
+    preferred = raw.str.split(";").str[-1].str.strip()              # keep last alias
 
-    traverse(data)
-    return names
+    return [n for n in preferred.tolist() if n]
 
 
 def extract_raw_seed_names(
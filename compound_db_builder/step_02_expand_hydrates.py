@@ -4,8 +4,14 @@ from __future__ import annotations
 
 from pathlib import Path
 import re
+
+import pandas as pd
+
 from io_json import read_json_list, write_json_list
 
+# Arrow-backed strings: native string kernels, no per-element Python objects
+_STRING = "string[pyarrow]"
+
 
 HYDRATE_DESCRIPTIONS = [
     "hydrate",
@@ -21,7 +27,7 @@ HYDRATE_DESCRIPTIONS = [
     "decahydrate",
 ]
 
-SALT_HINT_WORDS = {
+SALT_HINT_WORDS = frozenset({
     "chloride",
     "sulfate",
     "sulphate",
@@ -39,12 +45,16 @@ SALT_HINT_WORDS = {
     "perchlorate",
     "ferric",
     "ferrous",
-}
+})
+
+_HYDRATE_DESCRIPTION_RE = re.compile(
+    r"\b(?:%s)\b" % "|".join(map(re.escape, HYDRATE_DESCRIPTIONS)),
+    re.IGNORECASE,
+)
 
 
 def _remove_hydrate_description(name: str) -> str:
-    pattern = r"\b(?:%s)\b" % "|".join(map(re.escape, HYDRATE_DESCRIPTIONS))
-    return re.sub(pattern, "", name, flags=re.IGNORECASE).strip()
+    return _HYDRATE_DESCRIPTION_RE.sub("", name).strip()
 
 
 def hydrate_variants(name: str) -> list[str]:
@@ -73,28 +83,39 @@ def expand_names_with_hydrates(raw_names: list[str]) -> list[str]:
     """
     Return an extended list:
       - includes the original names
-      - plus hydrate variants (when applicable)
+      - plus hydrate variants (when applicable, see hydrate_variants)
       - deduped case-insensitively, preserving order
     """
-    seen: set[str] = set()
-    out: list[str] = []
-
-    def add(s: str) -> None:
-        s = str(s).strip()
-        if not s:
-            return
-        key = s.lower()
-        if key in seen:
-            return
-        seen.add(key)
-        out.append(s)
-
-    for n in raw_names:
-        add(n)
-        for v in hydrate_variants(n):
-            add(v)
-
-    return out
+    if not raw_names:
+        return []
+
+    names = pd.Series(list(map(str, raw_names)), dtype=_STRING).str.strip()
+
+    # Python re on purpose: unicode \b, exactly like _remove_hydrate_description
+    base = names.astype(object).str.replace(_HYDRATE_DESCRIPTION_RE, "", regex=True)
+    base = base.astype(_STRING).str.strip()
+
+    tokens = base.str.split().explode().astype(_STRING).str.strip(" ,;-").str.lower()
+    has_salt = tokens.isin(SALT_HINT_WORDS).groupby(level=0).any()
+    mentions_hydrate = names.str.lower().str.contains("hydrate", regex=False)
+    expand = (has_salt | mentions_hydrate) & base.ne("")
+
+    # (pos, sub) orders each name before its own variants, as in the one-by-one expansion
+    originals = pd.DataFrame({"pos": names.index, "sub": 0, "name": names})
+    suffixes = pd.DataFrame(
+        {"sub": range(1, len(HYDRATE_DESCRIPTIONS) + 1), "suffix": HYDRATE_DESCRIPTIONS}
+    )
+    variants = (
+        pd.DataFrame({"pos": base.index[expand], "base": base[expand]})
+        .merge(suffixes, how="cross")
+    )
+    variants["name"] = variants["base"].str.cat(variants["suffix"].astype(_STRING), sep=" ")
+
+    out = pd.concat([originals, variants[["pos", "sub", "name"]]], ignore_index=True)
+    out = out.sort_values(["pos", "sub"], kind="stable")
+    out = out.loc[out["name"].ne("")]
+    out = out.loc[~out["name"].str.lower().duplicated()]
+    return out["name"].tolist()
 
 
 def expand_hydrates_from_json(
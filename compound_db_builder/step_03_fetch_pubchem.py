@@ -10,8 +10,26 @@ from urllib.parse import quote
 import aiohttp
 import asyncio
 import pandas as pd
-
-from io_json import read_json_list, write_json
+import pyarrow as pa
+import pyarrow.json as pa_json
+
+from io_json import json_line, read_json_list, read_ndjson_lines, write_json_from_ndjson
+
+# Every call record carries (a subset of) these fields, all as strings
+_RECORD_SCHEMA = pa.schema(
+    [
+        (name, pa.string())
+        for name in (
+            "Query Name",
+            "Status",
+            "PubChem CID",
+            "PubChem Name",
+            "Molecular Formula",
+            "Molecular Weight",
+            "SMILES",
+        )
+    ]
+)
 
 
 @dataclass(frozen=True)
@@ -69,22 +87,15 @@ async def _fetch_record_for_name(
 
     base_url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{quote(compound_name)}"
 
-    # Resolve CID
-    cids_url = f"{base_url}/cids/JSON"
-    cids_json = await _get_json_with_retries(session, cids_url, config)
-    cid = None
-    if cids_json:
-        cid_list = cids_json.get("IdentifierList", {}).get("CID", [])
-        cid = str(cid_list[0]) if cid_list else None
-
-    # Fetch properties
+    # One round-trip: the property table already carries the CID of each match
+    # (same order as the /cids listing, so the first row is the best match).
     props_url = f"{base_url}/property/MolecularFormula,MolecularWeight,CanonicalSMILES,Title/JSON"
     props_json = await _get_json_with_retries(session, props_url, config)
     if not props_json:
         return {
             "Query Name": compound_name,
             "Status": "failed-no-props",
-            "PubChem CID": cid,
+            "PubChem CID": None,
         }
 
     props_list = props_json.get("PropertyTable", {}).get("Properties", [])
@@ -92,32 +103,72 @@ async def _fetch_record_for_name(
         return {
             "Query Name": compound_name,
             "Status": "failed-empty-props",
-            "PubChem CID": cid,
+            "PubChem CID": None,
         }
 
     props = props_list[0]
+    cid = props.get("CID")
     name = props.get("Title")
+    mw = props.get("MolecularWeight")
 
     return {
         "Query Name": compound_name,
         "Status": "ok",
-        "PubChem CID": cid or props.get("CID"),
+        "PubChem CID": str(cid) if cid is not None else None,
         "PubChem Name": name,
         "Molecular Formula": props.get("MolecularFormula"),
-        "Molecular Weight": props.get("MolecularWeight"),
+        "Molecular Weight": str(mw) if mw is not None else None,
         "SMILES": props.get("CanonicalSMILES"),
     }
 
 
-async def fetch_pubchem_raw_async(names: list[str], config: PubchemConfig) -> pd.DataFrame:
+def _read_records_ndjson(path: Path) -> pd.DataFrame:
+    if path.stat().st_size == 0:
+        return pd.DataFrame()
+    opts = pa_json.ParseOptions(explicit_schema=_RECORD_SCHEMA)
+    table = pa_json.read_json(path, parse_options=opts)
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+async def fetch_pubchem_raw_async(
+    names: list[str], config: PubchemConfig, *, out_ndjson: Path
+) -> pd.DataFrame:
+    """
+    Fetch every name and append each call record to out_ndjson as it completes
+    (no in-memory results list). Records a crashed earlier run left in out_ndjson
+    for these names are kept and those names are not fetched again.
+    The returned DataFrame is read back from that file.
+    """
     sem = asyncio.Semaphore(config.max_concurrent_requests)
     timeout = aiohttp.ClientTimeout(total=config.timeout_seconds)
 
-    results: list[dict[str, Any]] = []
+    # resume: keep only complete records of the names asked for this time
+    wanted = {str(n).strip() for n in names}
+    kept = [
+        (line, rec["Query Name"])
+        for line, rec in read_ndjson_lines(out_ndjson)
+        if isinstance(rec, dict) and rec.get("Query Name") in wanted
+    ]
+    recovered = {q for _, q in kept}
+    names = [n for n in names if str(n).strip() not in recovered]
+    if recovered:
+        print(f"recovered {len(recovered)} call records from {out_ndjson}")
+
     total = len(names)
     done = 0
 
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    # Reuse a small pool of keep-alive connections (avoids a TCP+TLS handshake per request).
+    # The semaphore still bounds in-flight names: queued requests would otherwise spend
+    # their total timeout waiting for a pooled connection.
+    connector = aiohttp.TCPConnector(
+        limit=config.max_concurrent_requests,
+        ttl_dns_cache=300,
+        keepalive_timeout=60,
+    )
+
+    out_ndjson.parent.mkdir(parents=True, exist_ok=True)
+    out_ndjson.write_bytes(b"".join(line + b"\n" for line, _ in kept))
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
 
         async def runner(n: str):
             nonlocal done
@@ -129,12 +180,14 @@ async def fetch_pubchem_raw_async(names: list[str], config: PubchemConfig) -> pd
                 return rec
 
         tasks = [runner(n) for n in names]
-        for fut in asyncio.as_completed(tasks):
-            rec = await fut
-            # ALWAYS append, even if failed
-            results.append(rec)
+        with out_ndjson.open("ab") as f:
+            for fut in asyncio.as_completed(tasks):
+                rec = await fut
+                # ALWAYS write, even if failed
+                f.write(json_line(rec))
+                f.flush()
 
-    return pd.DataFrame(results)
+    return _read_records_ndjson(out_ndjson)
 
 
 def fetch_pubchem_from_extended_names(
@@ -145,9 +198,11 @@ def fetch_pubchem_from_extended_names(
 ) -> pd.DataFrame:
     names = read_json_list(extended_names_json)
     cfg = pubchem_config or PubchemConfig()
+    out_ndjson = Path(out_raw_json).with_suffix(".ndjson")
 
-    df = asyncio.run(fetch_pubchem_raw_async(names, cfg))
+    df = asyncio.run(fetch_pubchem_raw_async(names, cfg, out_ndjson=out_ndjson))
 
-    # Save ALL call outcomes (success + failure)
-    write_json(out_raw_json, df.to_dict(orient="records"))
+    # Save ALL call outcomes (success + failure); the NDJSON is only needed to resume a crash
+    write_json_from_ndjson(out_raw_json, out_ndjson)
+    out_ndjson.unlink(missing_ok=True)
     return df
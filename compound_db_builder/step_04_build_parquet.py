@@ -5,7 +5,19 @@ from __future__ import annotations
 from pathlib import Path
 import re
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pubchem_cache import norm_cid_series
+
+# Arrow-backed strings: native string kernels, no per-element Python objects
+_STRING = "string[pyarrow]"
+
+# Right-hand side of a hydrate split: "H2O" or "<n> H2O"
+# (group 1 always participates: "" means a single H2O)
+_HYDRATE_RE = re.compile(r"^\s*(\d*)\s*H2O\s*$", re.IGNORECASE)
 
 
 def molar_mass_h2o() -> float:
@@ -26,12 +38,33 @@ def split_hydrate_formula(formula: str) -> tuple[str, int]:
         return s.strip(), 0
 
     left, right = [p.strip() for p in s.split("•", 1)]
-    m = re.search(r"^\s*(\d+)\s*H2O\s*$", right, flags=re.IGNORECASE)
-    if m:
-        return left, int(m.group(1))
-    if re.fullmatch(r"H2O", right, flags=re.IGNORECASE):
-        return left, 1
-    return left, 0
+    m = _HYDRATE_RE.match(right)
+    if not m:
+        return left, 0
+    return left, int(m.group(1)) if m.group(1) else 1
+
+
+def _split_hydrate_column(formulas: pd.Series) -> tuple[pd.Series, np.ndarray]:
+    """
+    Column-wise split_hydrate_formula.
+
+    Returns (base_formula, water_count); base is None where the formula is missing/empty.
+    """
+    s = formulas.astype(_STRING).str.replace("·", "•", regex=False)
+    valid = s.notna() & s.str.strip().ne("")
+    valid = valid.fillna(False).to_numpy(dtype=bool)
+
+    parts = s.str.partition("•")
+    base = parts[0].str.strip()
+    right = parts[2].str.strip()
+
+    m = right.str.extract(_HYDRATE_RE)[0]
+    matched = m.notna().to_numpy(dtype=bool)
+    n = pd.to_numeric(m, errors="coerce").fillna(1).to_numpy(dtype=np.int16)
+    n = np.where(matched & valid, n, 0).astype(np.int16)
+
+    base = base.astype(object).where(valid, None)
+    return base, n
 
 
 def _score_best_per_cid_row(row: pd.Series) -> int:
@@ -79,59 +112,46 @@ def build_compound_db(df_raw: pd.DataFrame) -> pd.DataFrame:
     if df_raw is None or df_raw.empty:
         return pd.DataFrame(columns=cols)
 
-    df = df_raw.copy()
-
-    # If Status exists, only build parquet from successful entries.
-    # (Failures remain cached in JSON, but do NOT enter the DB.)
-    if "Status" in df.columns:
-        df = df[df["Status"].astype(str).str.strip().str.lower().eq("ok")].copy()
+    df = df_raw.astype({c: _STRING for c in df_raw.select_dtypes(include="object").columns})
 
     # Must have CID
     if "PubChem CID" not in df.columns:
         return pd.DataFrame(columns=cols)
 
-    df = df[df["PubChem CID"].notna()].copy()
+    # Normalize CID to clean string (no trailing .0); blanks/"none" become missing
+    cid = norm_cid_series(df["PubChem CID"])
+    keep = cid.notna()
 
-    # Normalize CID to clean string (no trailing .0)
-    df["PubChem CID"] = (
-        df["PubChem CID"]
-        .astype(str)
-        .str.strip()
-        .str.replace(r"\.0$", "", regex=True)
-    )
+    # If Status exists, only build parquet from successful entries.
+    # (Failures remain cached in JSON, but do NOT enter the DB.)
+    if "Status" in df.columns:
+        keep &= df["Status"].astype(_STRING).str.strip().str.lower().eq("ok").fillna(False)
 
-    df = df[df["PubChem CID"].str.lower().ne("none") & (df["PubChem CID"] != "")].copy()
+    df = df.loc[keep].assign(**{"PubChem CID": cid[keep]})
 
     # Pick the best row per CID (most complete)
-    df["_score"] = df.apply(_score_best_per_cid_row, axis=1)
-    df["_idx"] = range(len(df))
-    df = df.sort_values(by=["PubChem CID", "_score", "_idx"], ascending=[True, False, False])
-    df = df.drop_duplicates(subset="PubChem CID", keep="first").drop(columns=["_score", "_idx"]).reset_index(drop=True)
+    # (scan in reverse so idxmax keeps the later row on equal scores; groups come out sorted by CID)
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    df = df.reset_index(drop=True)
+    score = df.apply(_score_best_per_cid_row, axis=1)
+    best = score.iloc[::-1].groupby(df["PubChem CID"].iloc[::-1]).idxmax()
+    df = df.loc[best.to_numpy()].reset_index(drop=True)
 
     # Build Formula/MW from raw fields
     if "Formula" not in df.columns:
         df["Formula"] = df.get("Molecular Formula")
 
-    df["MW"] = pd.to_numeric(df.get("Molecular Weight"), errors="coerce")
+    df["MW"] = pd.to_numeric(df.get("Molecular Weight"), errors="coerce").astype("float64")
 
-    h2o = molar_mass_h2o()
+    base, n = _split_hydrate_column(df["Formula"])
+    mw_minus = df["MW"].to_numpy(dtype="float64") - n * molar_mass_h2o()
 
-    def compute_minus_h2o(row):
-        formula = row.get("Formula")
-        mw = row.get("MW")
-        if not isinstance(formula, str) or not formula.strip():
-            return None, None
-        base, n = split_hydrate_formula(formula)
-        if mw is None or (isinstance(mw, float) and pd.isna(mw)):
-            return base, None
-        return base, float(mw) - float(n) * float(h2o)
+    df["Formula (-H2O)"] = base
+    df["MW (-H2O)"] = np.where(base.notna().to_numpy(), mw_minus, np.nan)
 
-    out = df.copy()
-    computed = out.apply(compute_minus_h2o, axis=1, result_type="expand")
-    out["Formula (-H2O)"] = computed[0]
-    out["MW (-H2O)"] = pd.to_numeric(computed[1], errors="coerce")
-
-    final = out[cols].copy()
+    # Keep the on-disk DB schema stable (plain object string columns)
+    final = df[cols].astype({c: object for c in ("PubChem CID", "PubChem Name", "Formula")})
     return final
 
 
@@ -139,8 +159,23 @@ def save_parquet(df: pd.DataFrame, out_path: str | Path) -> Path:
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
+    # Sorted by CID with per-row-group statistics, so readers filtering on CID can
+    # skip row groups; ZSTD + dictionary pages keep the file small.
+    if "PubChem CID" in df.columns:
+        df = df.sort_values("PubChem CID", kind="stable").reset_index(drop=True)
+
     try:
-        df.to_parquet(out_path, index=False, engine="pyarrow")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(
+            table,
+            out_path,
+            compression="zstd",
+            compression_level=3,
+            use_dictionary=True,
+            row_group_size=4096,
+            data_page_size=256 * 1024,
+            write_statistics=True,
+        )
     except Exception as e_pyarrow:
         try:
             df.to_parquet(out_path, index=False, engine="fastparquet")
@@ -4,7 +4,7 @@
 
 from .__about__ import __version__
 from .compound_db import CompoundDb
-from .medium_optimizer import optimize_medium
+from .medium_optimizer import optimize_medium, optimize_medium_batch
 from .utils import (
     elemental_counts,
     format_mass_with_unit,
@@ -18,6 +18,7 @@ __all__ = [
     "__version__",
     "CompoundDb",
     "optimize_medium",
+    "optimize_medium_batch",
     "molar_mass",
     "molar_mass_h2o",
     "split_hydrate_formula",
@@ -2,17 +2,42 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import asyncio
+import logging
+import threading
 
 from .errors import DataError
-from .paths import default_db_path, empty_db_df, ensure_db_in_cache, ensure_db_schema
+from .paths import (
+    default_db_path,
+    empty_db_df,
+    ensure_db_in_cache,
+    ensure_db_schema,
+)
 from .pubchem_client import PubChemClient
 
+log = logging.getLogger(__name__)
+
+# PubChem asks clients to stay at or below 5 requests per second
+_PUBCHEM_MAX_CONCURRENT = 5
+
+# Parquet metadata stamped on every DB written by CompoundDb: a cache file carrying the
+# current version already holds its derived hydrate columns (bump on schema changes)
+_SCHEMA_VERSION_KEY = b"optithor_schema_version"
+_SCHEMA_VERSION = b"1"
+
+# Recent CID lookups kept per CompoundDb (a report usually repeats its run's CIDs)
+_LOOKUP_CACHE_SIZE = 64
+
 REQUIRED_COLUMNS = {
     "PubChem CID",
     "PubChem Name",
@@ -39,21 +64,38 @@ def _normalize_cid(value: object) -> str:
     return s.removesuffix(".0")
 
 
-def _completeness_score(row: pd.Series) -> int:
+def _normalize_cid_column(s: pd.Series) -> pd.Series:
+    """
+    Vectorized str(v).strip() minus a trailing ".0" over a CID column.
+
+    Text columns (str/None, as read from parquet) run through Arrow string kernels;
+    anything else (numeric or mixed CIDs) takes the generic pandas path.
+    """
+    try:
+        arr = pa.array(s, type=pa.string(), from_pandas=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return s.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+
+    arr = pc.fill_null(arr, "None")  # same text as str(None)
+    arr = pc.replace_substring_regex(pc.utf8_trim_whitespace(arr), pattern=r"\.0$", replacement="")
+    return pd.Series(arr.to_numpy(zero_copy_only=False), index=s.index, name=s.name)
+
+
+def _completeness_scores(df: pd.DataFrame) -> np.ndarray:
     """
-    Higher score = more complete record.
+    Higher score = more complete record (one score per row).
+    A field counts when it is present and, for text, not blank.
     """
     fields = ["PubChem Name", "Formula", "Formula (-H2O)", "MW", "MW (-H2O)"]
-    score = 0
+    score = np.zeros(len(df), dtype=np.int16)
     for f in fields:
-        v = row.get(f, None)
-        if v is None:
-            continue
-        if isinstance(v, float) and pd.isna(v):
+        if f not in df.columns:
             continue
-        if isinstance(v, str) and not v.strip():
-            continue
-        score += 1
+        s = df[f]
+        present = s.notna().to_numpy(dtype=bool)
+        if not pd.api.types.is_numeric_dtype(s):
+            present &= s.astype(str).str.strip().ne("").to_numpy(dtype=bool)
+        score += present
     return score
 
 
@@ -64,8 +106,7 @@ def _dedupe_keep_most_complete(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
-    df = df.copy()
-    df["_score"] = df.apply(_completeness_score, axis=1)
+    df = df.assign(_score=_completeness_scores(df))
 
     # Keep highest score per CID; stable for ties
     df = (
@@ -76,6 +117,62 @@ def _dedupe_keep_most_complete(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
+def _merge_fetched_rows(df: pd.DataFrame, df_new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add fetched rows (already normalized) to the DB.
+    Only CIDs present in df_new are deduped; untouched DB rows are kept as they are.
+    """
+    overlap = df["PubChem CID"].isin(df_new["PubChem CID"])
+    merged = _dedupe_keep_most_complete(pd.concat([df[overlap], df_new], ignore_index=True))
+    return pd.concat([df[~overlap], merged], ignore_index=True)
+
+
+def _rows_for_cids(df: pd.DataFrame, cid_index: pd.Index, wanted: list[str]) -> pd.DataFrame:
+    """
+    Rows of df whose CID is in wanted, in wanted order (hash lookups on cid_index,
+    no scan of the CID column). Repeated CIDs in wanted are returned once.
+    """
+    if df.empty:
+        return df.reset_index(drop=True)
+    indexer, _ = cid_index.get_indexer_non_unique(list(dict.fromkeys(wanted)))
+    return df.iloc[indexer[indexer >= 0]].reset_index(drop=True)
+
+
+def _has_schema_version(path: Path) -> bool:
+    try:
+        meta = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return False
+    return meta.get(_SCHEMA_VERSION_KEY) == _SCHEMA_VERSION
+
+
+def _hydrate_gap_fills(raw: pd.DataFrame, derived: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    raw with the Formula (-H2O) / MW (-H2O) values of derived (ensure_db_schema(raw),
+    row for row) filled into its real gaps: null or blank cells. Everything else keeps
+    its on-disk value. None when no gap could be filled.
+    """
+    updates: dict[str, pd.Series] = {}
+
+    f = raw["Formula (-H2O)"]
+    new_f = derived["Formula (-H2O)"]
+    gap = (
+        (f.isna() | f.astype(str).str.strip().eq(""))
+        & raw["Formula"].notna()
+        & new_f.astype(str).str.strip().ne("")
+    ).to_numpy(dtype=bool)
+    if gap.any():
+        updates["Formula (-H2O)"] = f.mask(gap, new_f.to_numpy())
+
+    mw = pd.to_numeric(raw["MW (-H2O)"], errors="coerce")
+    new_mw = derived["MW (-H2O)"]
+    gap = (mw.isna() & new_mw.notna()).to_numpy(dtype=bool)
+    if gap.any():
+        updates["MW (-H2O)"] = mw.mask(gap, new_mw.to_numpy())
+
+    return raw.assign(**updates) if updates else None
+
+
 def _in_running_event_loop() -> bool:
     try:
         asyncio.get_running_loop()
@@ -83,8 +180,6 @@ def _in_running_event_loop() -> bool:
     except RuntimeError:
         return False
 
-def _debug(msg: str) -> None:
-    print(f"[CompoundDb] {msg}")
     
 @dataclass(slots=True)
 class CompoundDb:
@@ -95,10 +190,28 @@ class CompoundDb:
     - If the DB is missing in cache, attempts to copy the packaged DB into cache.
     - If force_reload=True, overwrites cache from packaged DB.
     - Optionally can fetch missing CIDs from PubChem (off by default).
+    - Keeps the last loaded DB in memory, keyed by (path, mtime), so repeated
+      lookups don't re-read the parquet file.
+    - Remembers the rows of the last few CID lookups against that DB.
+    - Hydrate columns derived on load are written back to the managed cache copy
+      only (never to a user-supplied path), stamped with a schema version.
+    - With read_only=True the packaged DB is read in place (memory-mapped)
+      when no cache DB exists yet, and nothing is ever written back.
     """
 
     path: str | Path | None = None
     pubchem: PubChemClient | None = None
+    read_only: bool = False
+
+    _cached_key: tuple[str, int] | None = field(default=None, init=False, repr=False, compare=False)
+    _cached_df: pd.DataFrame | None = field(default=None, init=False, repr=False, compare=False)
+    _cached_cid_index: pd.Index | None = field(default=None, init=False, repr=False, compare=False)
+    _lookup_cache: OrderedDict[tuple[str, ...], tuple[pd.DataFrame, pd.Index]] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    _cache_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
 
     def get_path(self) -> Path:
         return Path(self.path) if self.path else default_db_path()
@@ -110,12 +223,7 @@ class CompoundDb:
             return df
 
         if "PubChem CID" in df.columns:
-            df["PubChem CID"] = (
-                df["PubChem CID"]
-                .astype(str)
-                .str.strip()
-                .str.replace(r"\.0$", "", regex=True)
-            )
+            df["PubChem CID"] = _normalize_cid_column(df["PubChem CID"])
 
         for col in ("PubChem Name", "Formula", "Formula (-H2O)"):
             if col in df.columns:
@@ -137,11 +245,34 @@ class CompoundDb:
         """
         Load DB (prefer cache). If force_reload=True, re-copy from packaged DB into cache.
         """
-        p = self.get_path()
-        ensure_db_in_cache(p, force_reload=force_reload)
+        df, _ = self._load_indexed(force_reload=force_reload)
+        # callers may modify the frame they get back; the cached one stays intact
+        return df.copy()
+
+    def _load_indexed(self, *, force_reload: bool = False) -> tuple[pd.DataFrame, pd.Index]:
+        """
+        The cached DB frame (do not modify) and an Index over its PubChem CIDs.
+        """
+        p = ensure_db_in_cache(self.get_path(), force_reload=force_reload, read_only=self.read_only)
 
         try:
-            df = pd.read_parquet(p)
+            key = (str(p), p.stat().st_mtime_ns)
+        except OSError:
+            key = None
+
+        # force_reload always re-reads: the fresh copy may land within the same mtime tick
+        with self._cache_lock:
+            if (
+                not force_reload
+                and key is not None
+                and key == self._cached_key
+                and self._cached_df is not None
+            ):
+                return self._cached_df, self._cached_cid_index
+
+        try:
+            # mapped rather than read into a buffer; repeated opens come from the page cache
+            df = pd.read_parquet(p, memory_map=True)
         except FileNotFoundError as e:
             raise DataError(
                 f"Compound DB not found at: {p}. "
@@ -151,35 +282,94 @@ class CompoundDb:
             raise DataError(f"Failed to read parquet DB at: {p}") from e
 
         self.validate_schema(df)
-        return self.normalize(df)
+        # derive before normalize() turns missing text into "None"
+        raw = df
+        df = ensure_db_schema(raw)
+
+        # persist derived hydrate columns into the managed cache copy (never a user-supplied
+        # path) so the next load finds them filled in
+        fills = None
+        if df is not raw and self.path is None and not self.read_only:
+            if not _has_schema_version(p):
+                fills = _hydrate_gap_fills(raw, df)
+        df = self.normalize(df)
+        if fills is not None:
+            try:
+                self._write_cache(fills)
+                key = (str(p), p.stat().st_mtime_ns)
+            except OSError as e:
+                log.debug("Could not write derived hydrate columns to %s: %s", p, e)
+
+        cid_index = pd.Index(df["PubChem CID"]) if not df.empty else pd.Index([])
+
+        with self._cache_lock:
+            self._cached_key, self._cached_df, self._cached_cid_index = key, df, cid_index
+            self._lookup_cache.clear()
+        return df, cid_index
+
+    def _lookup_rows(
+        self, df: pd.DataFrame, cid_index: pd.Index, wanted: list[str]
+    ) -> pd.DataFrame:
+        """
+        _rows_for_cids on the frame from _load_indexed, memoized per CID set: the cached
+        rows are keyed on the sorted unique CIDs and reordered to wanted on the way out,
+        so the same CIDs in a different order reuse one lookup.
+        """
+        key = tuple(sorted(set(wanted)))
+        with self._cache_lock:
+            hit = self._lookup_cache.get(key)
+            if hit is not None and self._cached_df is df:
+                self._lookup_cache.move_to_end(key)
+                rows, rows_index = hit
+                return _rows_for_cids(rows, rows_index, wanted)
+
+        rows = _rows_for_cids(df, cid_index, list(key))
+        rows_index = pd.Index(rows["PubChem CID"])
+
+        with self._cache_lock:
+            if self._cached_df is df:
+                self._lookup_cache[key] = (rows, rows_index)
+                if len(self._lookup_cache) > _LOOKUP_CACHE_SIZE:
+                    self._lookup_cache.popitem(last=False)
+        return _rows_for_cids(rows, rows_index, wanted)
 
     def _write_cache(self, df: pd.DataFrame) -> None:
         """
-        Write updated DB into the cache path.
+        Write updated DB into the cache path (skipped for read_only repositories).
         """
+        if self.read_only:
+            log.debug("Read-only compound DB; fetched compounds are not written back.")
+            return
+
         p = self.get_path()
         p.parent.mkdir(parents=True, exist_ok=True)
-        df.to_parquet(p, index=False)
+        with self._cache_lock:
+            self._cached_key, self._cached_df, self._cached_cid_index = None, None, None
+            self._lookup_cache.clear()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = {**(table.schema.metadata or {}), _SCHEMA_VERSION_KEY: _SCHEMA_VERSION}
+        pq.write_table(table.replace_schema_metadata(meta), p)
 
     async def _fetch_missing_rows_async(self, missing_cids: list[str]) -> pd.DataFrame:
         if not missing_cids:
             return pd.DataFrame(columns=list(REQUIRED_COLUMNS))
 
-        _debug(f"Fetching {len(missing_cids)} missing CIDs from PubChem: {missing_cids}")
+        log.debug("Fetching %d missing CIDs from PubChem: %s", len(missing_cids), missing_cids)
 
         client = self.pubchem or PubChemClient()
         records: list[dict[str, object]] = []
 
-        for cid in missing_cids:
-            _debug(f" Fetching CID {cid} from PubChem")
-            rec = await client.fetch_by_cid(cid)
+        # comma-separated CID batches, at most _PUBCHEM_MAX_CONCURRENT requests in flight
+        by_cid = await client.fetch_by_cids(missing_cids, max_concurrent=_PUBCHEM_MAX_CONCURRENT)
+        results = [by_cid.get(cid) for cid in missing_cids]
 
+        for cid, rec in zip(missing_cids, results, strict=True):
             if not rec:
-                _debug(f" CID {cid}: no data returned")
+                log.debug(" CID %s: no data returned", cid)
                 continue
 
             cid_norm = _normalize_cid(rec.get("PubChem CID", cid))
-            _debug(f" CID {cid_norm}: fetched successfully")
+            log.debug(" CID %s: fetched successfully", cid_norm)
 
             records.append(
                 {
@@ -194,13 +384,13 @@ class CompoundDb:
 
         df_new = pd.DataFrame.from_records(records)
         if df_new.empty:
-            _debug("No new compounds fetched from PubChem.")
+            log.debug("No new compounds fetched from PubChem.")
             return df_new
 
         df_new = self.normalize(df_new)
         df_new = ensure_db_schema(df_new)
 
-        _debug(f"Fetched {len(df_new)} new compounds from PubChem.")
+        log.debug("Fetched %d new compounds from PubChem.", len(df_new))
         return df_new
 
 
@@ -217,44 +407,38 @@ class CompoundDb:
         if not wanted:
             return empty_db_df()
 
-        df = self.load(force_reload=force_reload)
+        df, cid_index = self._load_indexed(force_reload=force_reload)
         if df.empty:
             return empty_db_df()
 
-        wanted_set = set(wanted)
-        hit = df[df["PubChem CID"].isin(wanted_set)].copy()
+        hit = self._lookup_rows(df, cid_index, wanted)
 
         if fetch_missing:
-            found_set = set(hit["PubChem CID"].astype(str)) if not hit.empty else set()
-            missing = [cid for cid in wanted if cid not in found_set]
+            # CIDs are normalized text from load(); hash them as-is
+            found = frozenset(hit["PubChem CID"].tolist())
+            missing = [cid for cid in dict.fromkeys(wanted) if cid not in found]
 
             if missing:
-                _debug(f"Missing CIDs in DB: {missing}")
+                log.debug("Missing CIDs in DB: %s", missing)
                 
                 df_new = await self._fetch_missing_rows_async(missing)
                 if not df_new.empty:
-                    df_all = pd.concat([df, df_new], ignore_index=True)
-                    df_all = self.normalize(df_all)
-                    df_all = ensure_db_schema(df_all)
-                    df_all = _dedupe_keep_most_complete(df_all)
+                    df_all = _merge_fetched_rows(df, df_new)
 
                         
                     if update_cache:
-                        _debug("Updating local compound DB cache with fetched compounds.")
+                        log.debug("Updating local compound DB cache with fetched compounds.")
                         self._write_cache(df_all)
-                        _debug("Local compound DB cache updated.")
+                        log.debug("Local compound DB cache updated.")
 
-                    df = df_all
-                    hit = df[df["PubChem CID"].isin(wanted_set)].copy()
+                    hit = _rows_for_cids(df_all, pd.Index(df_all["PubChem CID"]), wanted)
             else:
-                _debug("No missing CIDs; PubChem fetch not needed.")
+                log.debug("No missing CIDs; PubChem fetch not needed.")
         
         if hit.empty:
             return empty_db_df()
 
-        order = pd.Categorical(hit["PubChem CID"], categories=wanted, ordered=True)
-        hit = hit.assign(_order=order).sort_values("_order").drop(columns=["_order"])
-        return hit.reset_index(drop=True)
+        return hit
 
     def get_compounds_by_cids(
         self,
@@ -292,16 +476,13 @@ class CompoundDb:
         if not wanted:
             return empty_db_df()
 
-        df = self.load(force_reload=force_reload)
+        df, cid_index = self._load_indexed(force_reload=force_reload)
         if df.empty:
             return empty_db_df()
 
-        wanted_set = set(wanted)
-        hit = df[df["PubChem CID"].isin(wanted_set)].copy()
+        hit = self._lookup_rows(df, cid_index, wanted)
         if hit.empty:
             return empty_db_df()
 
-        order = pd.Categorical(hit["PubChem CID"], categories=wanted, ordered=True)
-        hit = hit.assign(_order=order).sort_values("_order").drop(columns=["_order"])
-        return hit.reset_index(drop=True)
+        return hit
     
\ No newline at end of file
@@ -2,8 +2,59 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Dict, List
+from types import MappingProxyType
+
+# Shared, immutable defaults: SolverConfig() copies nothing per construction.
+# (dataclasses reject a mapping as a plain default, so the factories hand out the shared proxy.)
+_DEFAULT_ELEMENTS: tuple[str, ...] = (
+    "C", "H", "O", "N", "S", "P",
+    "Cl", "Na", "K", "Mg", "Ca",
+    "Fe", "Mn", "Zn", "Cu", "Co",
+    "Mo", "Ni", "Br",
+)
+
+# g CDW / g Element
+_DEFAULT_REFERENCE_VALUES: Mapping[str, float] = MappingProxyType({
+    "C": 1,
+    "N": 8,
+    "S": 100,
+    "P": 33,
+    "K": 100,
+    "Mg": 200,
+    "Ca": 100,
+    "Fe": 200,
+    "Mn": 1e4,
+    "Zn": 1e4,
+    "Cu": 1e5,
+    "Co": 1e5,
+    "Cl": 0,
+    "Na": 0,
+    "Mo": 0,
+    "Ni": 0,
+    "Br": 0,
+})
+
+_DEFAULT_EXCESS_FACTORS: Mapping[str, float] = MappingProxyType({
+    "C": 1,
+    "N": 3,
+    "S": 5,
+    "P": 5,
+    "K": 5,
+    "Mg": 5,
+    "Ca": 10,
+    "Fe": 10,
+    "Mn": 20,
+    "Zn": 20,
+    "Cu": 20,
+    "Co": 20,
+    "Cl": 0,
+    "Na": 0,
+    "Mo": 0,
+    "Ni": 0,
+    "Br": 0,
+})
 
 
 @dataclass(frozen=True, slots=True)
@@ -19,65 +70,18 @@ class SolverConfig:
     # -----------------------------
     # Chemistry / elements
     # -----------------------------
-    elements: List[str] = field(
-        default_factory=lambda: [
-            "C", "H", "O", "N", "S", "P",
-            "Cl", "Na", "K", "Mg", "Ca",
-            "Fe", "Mn", "Zn", "Cu", "Co",
-            "Mo", "Ni", "Br",
-        ]
-    )
+    elements: tuple[str, ...] = _DEFAULT_ELEMENTS
 
     # -----------------------------
     # Biological reference values
     # g CDW / g Element
     # -----------------------------
-    reference_values: Dict[str, float] = field(
-        default_factory=lambda: {
-            "C": 1,
-            "N": 8,
-            "S": 100,
-            "P": 33,
-            "K": 100,
-            "Mg": 200,
-            "Ca": 100,
-            "Fe": 200,
-            "Mn": 1e4,
-            "Zn": 1e4,
-            "Cu": 1e5,
-            "Co": 1e5,
-            "Cl": 0,
-            "Na": 0,
-            "Mo": 0,
-            "Ni": 0,
-            "Br": 0,
-        }
-    )
+    reference_values: Mapping[str, float] = field(default_factory=lambda: _DEFAULT_REFERENCE_VALUES)
 
     # -----------------------------
     # Excess allowance factors
     # -----------------------------
-    excess_factors: Dict[str, float] = field(
-        default_factory=lambda: {
-            "C": 1,
-            "N": 3,
-            "S": 5,
-            "P": 5,
-            "K": 5,
-            "Mg": 5,
-            "Ca": 10,
-            "Fe": 10,
-            "Mn": 20,
-            "Zn": 20,
-            "Cu": 20,
-            "Co": 20,
-            "Cl": 0,
-            "Na": 0,
-            "Mo": 0,
-            "Ni": 0,
-            "Br": 0,
-        }
-    )
+    excess_factors: Mapping[str, float] = field(default_factory=lambda: _DEFAULT_EXCESS_FACTORS)
 
     # -----------------------------
     # Biomass constraint
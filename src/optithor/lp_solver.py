@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
 
 import numpy as np
 from scipy.optimize import linprog
@@ -36,13 +35,17 @@ def solve_linear_program(
         dtype=float,
     )
 
-    bounds: List[Tuple[float, float]] = [
-        (float(solver_config.lower_bound), float(solver_config.upper_bound))
-    ] * num_variables
+    # One (lb, ub) pair applies to every variable; no per-variable list to validate.
+    bounds: tuple[float, float] = (
+        float(solver_config.lower_bound),
+        float(solver_config.upper_bound),
+    )
 
+    # Dense A_eq on purpose: for these tiny LPs a pre-built sparse matrix is slower
+    # to pass through linprog than letting HiGHS take the dense array.
     result = linprog(
         cost_vector,
-        A_eq=a_eq,
+        A_eq=np.ascontiguousarray(a_eq, dtype=float),
         b_eq=b_eq,
         bounds=bounds,
         method=solver_config.method,
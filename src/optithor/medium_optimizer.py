@@ -2,14 +2,38 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import numpy as np
-import pandas as pd
 
 from .config import SolverConfig
-from .lp_solver import solve_linear_program
+from .errors import DataError
+from .lp_solver import LpSolution, solve_linear_program
 from .paths import ensure_db_schema
-from .types import CompoundDose, ElementMatch, MediumOptimizationInput, MediumOptimizationResult
-from .utils import elemental_counts, molar_mass
+from .types import (
+    CompoundDose,
+    CompoundDoseArrays,
+    ElementMatch,
+    ElementMatchArrays,
+    MediumOptimizationInput,
+    MediumOptimizationResult,
+)
+from .utils import elemental_count_matrix, molar_mass
+
+
+@dataclass(frozen=True, slots=True)
+class _MediumProblem:
+    """Everything needed to solve one medium LP and turn its solution into a result."""
+
+    cids: list[str]
+    mw_hydrated: np.ndarray
+    selected_elements: list[str]
+    element_molar_mass: np.ndarray
+    required_mass_vec: np.ndarray
+    a_eq: np.ndarray
+    b_eq: np.ndarray
 
 
 def optimize_medium(
@@ -19,6 +43,65 @@ def optimize_medium(
 ) -> MediumOptimizationResult:
     solver_config = solver_config or SolverConfig()
 
+    problem = _prepare_problem(medium_input, compound_repository)
+    if isinstance(problem, MediumOptimizationResult):
+        return problem
+
+    return _finish_problem(problem, _solve_problem(problem, solver_config))
+
+
+def optimize_medium_batch(
+    medium_inputs: Sequence[MediumOptimizationInput],
+    compound_repository,
+    solver_config: SolverConfig | None = None,
+    *,
+    max_workers: int | None = None,
+) -> list[MediumOptimizationResult]:
+    """
+    optimize_medium over many inputs; results are in input order.
+
+    Compound lookups and matrix building run in the calling thread (one repository
+    access at a time); the independent LP solves run on a thread pool, since HiGHS
+    does its work outside the GIL. An input that optimize_medium would reject with
+    DataError gets a failed result in its own slot; the other inputs are still solved.
+    """
+    solver_config = solver_config or SolverConfig()
+
+    prepared = [_prepare_problem_or_failure(inp, compound_repository) for inp in medium_inputs]
+    problems = [p for p in prepared if isinstance(p, _MediumProblem)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        solutions = list(pool.map(lambda p: _solve_problem(p, solver_config), problems))
+
+    # solutions are in problem order, i.e. the order the problems appear in prepared
+    remaining = iter(solutions)
+    return [
+        p if isinstance(p, MediumOptimizationResult) else _finish_problem(p, next(remaining))
+        for p in prepared
+    ]
+
+
+def _prepare_problem_or_failure(
+    medium_input: MediumOptimizationInput,
+    compound_repository,
+) -> _MediumProblem | MediumOptimizationResult:
+    try:
+        return _prepare_problem(medium_input, compound_repository)
+    except DataError as e:
+        return MediumOptimizationResult(
+            success=False,
+            message=f"invalid input: {e}",
+            compound_doses=[],
+            element_matches=[],
+            diagnostics=str(e),
+        )
+
+
+def _prepare_problem(
+    medium_input: MediumOptimizationInput,
+    compound_repository,
+) -> _MediumProblem | MediumOptimizationResult:
+    """Build the LP for one input, or the failed result when there is nothing to solve."""
     compounds_df = compound_repository.get_compounds_by_cids(medium_input.compound_cids)
     if compounds_df.empty:
         return MediumOptimizationResult(
@@ -29,21 +112,17 @@ def optimize_medium(
             diagnostics="repository returned an empty dataframe",
         )
 
+    # no-op (no copy) for CompoundDb lookups and already-complete frames
     compounds_df = ensure_db_schema(compounds_df)
 
-    # --- build requirements
-    requirement_rows = []
-    for element, req in medium_input.required_elements.items():
-        if req.reference_yield_g_cdw_per_g <= 0 or req.excess_factor <= 0:
-            continue
-
-        ref_mass = medium_input.max_dry_biomass_g_per_l / req.reference_yield_g_cdw_per_g
-        required_mass = ref_mass * req.excess_factor
-        required_mol = required_mass / molar_mass(element)
-
-        requirement_rows.append((element, required_mass, required_mol))
+    # --- build requirements (one entry per element with a positive yield and excess factor)
+    valid = [
+        (element, req)
+        for element, req in medium_input.required_elements.items()
+        if req.reference_yield_g_cdw_per_g > 0 and req.excess_factor > 0
+    ]
 
-    if not requirement_rows:
+    if not valid:
         return MediumOptimizationResult(
             success=False,
             message="no valid element requirements provided",
@@ -52,43 +131,72 @@ def optimize_medium(
             diagnostics="all elements had non-positive yield or excess factor",
         )
 
-    requirements_df = pd.DataFrame(
-        requirement_rows,
-        columns=[
-            "Element",
-            "Required Element Mass [g/L]",
-            "Required Element Quantity [mol/L]",
-        ],
-    )
+    selected_elements = [element for element, _ in valid]
+    yields = np.array([req.reference_yield_g_cdw_per_g for _, req in valid], dtype=float)
+    excess_factors = np.array([req.excess_factor for _, req in valid], dtype=float)
+    element_molar_mass = np.array([molar_mass(e) for e in selected_elements], dtype=float)
 
-    selected_elements = requirements_df["Element"].tolist()
+    unknown = [e for e, mm in zip(selected_elements, element_molar_mass, strict=True) if mm <= 0]
+    if unknown:
+        raise DataError(f"unknown element symbol(s): {', '.join(unknown)}")
 
-    # --- elemental counts (from anhydrous formula)
-    for element in selected_elements:
-        compounds_df[element] = 0
+    required_mass_vec = medium_input.max_dry_biomass_g_per_l / yields * excess_factors
+    required_mol_vec = required_mass_vec / element_molar_mass
 
-    for idx, row in compounds_df.iterrows():
-        counts = elemental_counts(str(row["Formula (-H2O)"]), selected_elements)
-        for element in selected_elements:
-            compounds_df.at[idx, element] = counts[element]
+    # --- elemental counts (from anhydrous formula), one (n_compounds, n_elements) matrix
+    counts = elemental_count_matrix(compounds_df["Formula (-H2O)"], selected_elements)
 
-    selected_compounds_df = compounds_df[["PubChem CID"] + selected_elements]
+    stoichiometry = counts.astype(np.float64)  # (n_compounds, n_elements)
+    a_eq = stoichiometry.T
+    b_eq = required_mol_vec
 
-    a_eq = selected_compounds_df[selected_elements].to_numpy(dtype=float).T
-    b_eq = requirements_df["Required Element Quantity [mol/L]"].to_numpy(dtype=float)
+    # Every requirement is positive and doses are non-negative, so an element that no
+    # compound contains makes the system infeasible: report it without calling the LP.
+    # (A rank-deficient a_eq alone is not infeasible, so there is no rank check here.)
+    covered = stoichiometry.any(axis=0)
+    uncovered = [e for e, ok in zip(selected_elements, covered, strict=True) if not ok]
+    if uncovered:
+        return MediumOptimizationResult(
+            success=False,
+            message=(
+                "optimization could not be solved: the problem is infeasible "
+                f"(no provided compound contains {', '.join(uncovered)})"
+            ),
+            compound_doses=[],
+            element_matches=[],
+            diagnostics=analyze_unsolvable_system(
+                b_eq=b_eq,
+                stoichiometry=stoichiometry,
+                selected_elements=selected_elements,
+            ),
+        )
 
-    solution = solve_linear_program(
+    return _MediumProblem(
+        cids=compounds_df["PubChem CID"].astype(str).tolist(),
+        mw_hydrated=compounds_df["MW"].to_numpy(dtype=float),
+        selected_elements=selected_elements,
+        element_molar_mass=element_molar_mass,
+        required_mass_vec=required_mass_vec,
         a_eq=a_eq,
         b_eq=b_eq,
-        num_variables=a_eq.shape[1],
+    )
+
+
+def _solve_problem(problem: _MediumProblem, solver_config: SolverConfig) -> LpSolution:
+    return solve_linear_program(
+        a_eq=problem.a_eq,
+        b_eq=problem.b_eq,
+        num_variables=problem.a_eq.shape[1],
         solver_config=solver_config,
     )
 
+
+def _finish_problem(problem: _MediumProblem, solution: LpSolution) -> MediumOptimizationResult:
     if not solution.success or solution.x is None:
         diagnostics = analyze_unsolvable_system(
-            b_eq=b_eq,
-            selected_compounds_df=selected_compounds_df,
-            selected_elements=selected_elements,
+            b_eq=problem.b_eq,
+            stoichiometry=problem.a_eq.T,
+            selected_elements=problem.selected_elements,
         )
         return MediumOptimizationResult(
             success=False,
@@ -100,39 +208,52 @@ def optimize_medium(
 
     # --- doses
     mol_per_l = solution.x
-    mw_hydrated = compounds_df["MW"].to_numpy(dtype=float)
-    mass_g_per_l = mol_per_l * mw_hydrated
-
+    mass_g_per_l = mol_per_l * problem.mw_hydrated
+
+    # heaviest dose first; the stable sort keeps input order among equal masses
+    dosed = np.flatnonzero(np.isfinite(mass_g_per_l) & (mass_g_per_l > 0))
+    order = dosed[np.argsort(-mass_g_per_l[dosed], kind="stable")]
+    dose_arrays = CompoundDoseArrays(
+        cids=np.asarray(problem.cids, dtype=object)[order],
+        mass_g_per_l=mass_g_per_l[order],
+        mol_per_l=mol_per_l[order],
+    )
     compound_doses = [
-        CompoundDose(cid=str(cid), mass_g_per_l=float(m), mol_per_l=float(n))
+        CompoundDose(cid=cid, mass_g_per_l=float(m), mol_per_l=float(n))
         for cid, m, n in zip(
-            compounds_df["PubChem CID"].astype(str),
-            mass_g_per_l,
-            mol_per_l,
+            dose_arrays.cids, dose_arrays.mass_g_per_l, dose_arrays.mol_per_l, strict=True
         )
-        if np.isfinite(m) and m > 0
     ]
-    compound_doses.sort(key=lambda d: d.mass_g_per_l, reverse=True)
 
-    # --- element matches
-    element_matches = []
-    for _, row in requirements_df.iterrows():
-        element = row["Element"]
-        required_mass = float(row["Required Element Mass [g/L]"])
+    # --- element matches (obtained mol per element in one matrix-vector product)
+    obtained_mass_vec = (problem.a_eq @ mol_per_l) * problem.element_molar_mass
 
-        obtained_mol = float((compounds_df[element].to_numpy(dtype=float) * mol_per_l).sum())
-        obtained_mass = obtained_mol * molar_mass(element)
+    required_mass_vec = problem.required_mass_vec
+    match_percent = np.zeros_like(required_mass_vec)
+    positive = required_mass_vec > 0
+    match_percent[positive] = (obtained_mass_vec[positive] / required_mass_vec[positive]) * 100
 
-        match_percent = (obtained_mass / required_mass) * 100 if required_mass > 0 else 0.0
-
-        element_matches.append(
-            ElementMatch(
-                element=str(element),
-                required_mass_g_per_l=required_mass,
-                obtained_mass_g_per_l=float(obtained_mass),
-                match_percent=float(match_percent),
-            )
+    match_arrays = ElementMatchArrays(
+        elements=np.asarray([str(e) for e in problem.selected_elements], dtype=object),
+        required_mass_g_per_l=required_mass_vec,
+        obtained_mass_g_per_l=obtained_mass_vec,
+        match_percent=match_percent,
+    )
+    element_matches = [
+        ElementMatch(
+            element=element,
+            required_mass_g_per_l=float(required_mass),
+            obtained_mass_g_per_l=float(obtained_mass),
+            match_percent=float(match),
         )
+        for element, required_mass, obtained_mass, match in zip(
+            match_arrays.elements,
+            match_arrays.required_mass_g_per_l,
+            match_arrays.obtained_mass_g_per_l,
+            match_arrays.match_percent,
+            strict=True,
+        )
+    ]
 
     return MediumOptimizationResult(
         success=True,
@@ -140,21 +261,26 @@ def optimize_medium(
         compound_doses=compound_doses,
         element_matches=element_matches,
         diagnostics=None,
+        compound_dose_arrays=dose_arrays,
+        element_match_arrays=match_arrays,
     )
 
 
 def analyze_unsolvable_system(
     b_eq: np.ndarray,
-    selected_compounds_df: pd.DataFrame,
+    stoichiometry: np.ndarray,
     selected_elements: list[str],
 ) -> str:
+    """
+    stoichiometry: (n_compounds, n_elements) element counts, columns in selected_elements order.
+    """
     num_constraints = len(b_eq)
 
+    element_totals = stoichiometry.sum(axis=0)
     missing_elements = [
         element
-        for element in selected_elements
-        if element not in selected_compounds_df.columns
-        or selected_compounds_df[element].sum() == 0
+        for element, total in zip(selected_elements, element_totals, strict=True)
+        if total == 0
     ]
 
     message_parts = [
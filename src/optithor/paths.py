@@ -4,12 +4,18 @@ from __future__ import annotations
 
 import os
 import shutil
+import sys
+from functools import cache
 from importlib import resources
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from .utils import molar_mass_h2o, split_hydrate_formula
+from .utils import molar_mass_h2o, split_hydrate_formulas
+
+# Linux FICLONE ioctl: share the source extents (btrfs, xfs, ...) instead of copying bytes
+_FICLONE = 0x40049409
 
 
 def default_data_dir() -> Path:
@@ -33,26 +39,58 @@ def default_db_path() -> Path:
     return default_data_dir() / "compound_db.parquet"
 
 
+@cache
 def packaged_db_path() -> Path:
     """
     Path to the packaged DB inside the installed wheel/sdist.
 
     Always returns a Path (even if missing), so callers don't crash on None.
+    Resolved once per process: the installed package does not move.
     """
     pkg = "optithor"
     root = resources.files(pkg)
     return root.joinpath("resources", "compound_db.parquet")
 
 
+def _clone_file(src: Path, dst: Path) -> bool:
+    """
+    Copy-on-write clone of src to dst where the filesystem supports it.
+
+    Returns False (dst left for a regular copy) when cloning is not possible.
+    Hardlinks are not an option: the cache file is rewritten in place on updates,
+    which would modify the packaged DB as well.
+    """
+    try:
+        if sys.platform == "linux":
+            import fcntl
+
+            with open(src, "rb") as fs, open(dst, "wb") as fd:
+                fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+            return True
+
+        if sys.platform == "darwin":
+            import ctypes
+
+            libc = ctypes.CDLL(None, use_errno=True)
+            dst.unlink(missing_ok=True)  # clonefile refuses an existing target
+            return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+    except (OSError, AttributeError, TypeError):
+        pass
+    return False
+
+
 def ensure_db_in_cache(
     target_path: Path | None = None,
     *,
     force_reload: bool = False,
+    read_only: bool = False,
 ) -> Path:
     """
     Ensure the DB exists at the cache location.
 
     If force_reload=True, overwrite cache from packaged DB.
+    If read_only=True, nothing is copied: an existing cache DB is used as is,
+    otherwise (or with force_reload) the packaged DB path itself is returned.
     """
     target = Path(target_path) if target_path else default_db_path()
 
@@ -62,23 +100,43 @@ def ensure_db_in_cache(
     src = packaged_db_path()
     if not src.is_file():
         return target
+    if read_only:
+        return src
 
     target.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copyfile(src, target)
+    if not _clone_file(src, target):
+        shutil.copyfile(src, target)
     return target
 
 
 def empty_db_df() -> pd.DataFrame:
-    """Empty DB dataframe with the expected columns."""
-    cols = [
-        "PubChem CID",
-        "PubChem Name",
-        "Formula",
-        "Formula (-H2O)",
-        "MW",
-        "MW (-H2O)",
-    ]
-    return pd.DataFrame(columns=cols)
+    """
+    Empty DB dataframe with the expected columns, typed like a loaded DB frame
+    (str object columns, float64 masses) so empty and non-empty results concat cleanly.
+    """
+    text = ["PubChem CID", "PubChem Name", "Formula", "Formula (-H2O)"]
+    cols = {c: pd.Series([], dtype=object) for c in text}
+    cols.update({c: pd.Series([], dtype="float64") for c in ("MW", "MW (-H2O)")})
+    return pd.DataFrame(cols)
+
+
+def _schema_already_ok(df: pd.DataFrame) -> bool:
+    """
+    True when ensure_db_schema would change nothing: text columns hold only str,
+    MW columns are numeric and every hydrate-free value is filled in.
+    """
+    cols = ("Formula", "Formula (-H2O)", "MW", "MW (-H2O)")
+    if not all(c in df.columns for c in cols):
+        return False
+    if not all(pd.api.types.is_numeric_dtype(df[c]) for c in ("MW", "MW (-H2O)")):
+        return False
+    if df["MW (-H2O)"].isna().any():
+        return False
+    # object columns of str only (astype(str) would turn None/NaN into text)
+    for c in ("Formula", "Formula (-H2O)"):
+        if df[c].dtype != object or pd.api.types.infer_dtype(df[c], skipna=False) != "string":
+            return False
+    return bool(df["Formula (-H2O)"].str.strip().ne("").all())
 
 
 def ensure_db_schema(df: pd.DataFrame) -> pd.DataFrame:
@@ -89,11 +147,17 @@ def ensure_db_schema(df: pd.DataFrame) -> pd.DataFrame:
     - If Formula (-H2O) is missing/empty, derive it from Formula (hydrate split).
     - If MW (-H2O) is missing/NaN, estimate it from MW and hydrate water count.
     """
-    if df.empty:
+    if df.empty or _schema_already_ok(df):
         return df
 
     out = df.copy()
 
+    # real gaps, taken before astype(str) turns None/NaN into text
+    if "Formula (-H2O)" in out.columns:
+        formula_minus_na = out["Formula (-H2O)"].isna()
+    else:
+        formula_minus_na = pd.Series(True, index=out.index)
+
     # Coerce core fields (robust to user-provided DBs)
     if "Formula" in out.columns:
         out["Formula"] = out["Formula"].astype(str)
@@ -115,35 +179,29 @@ def ensure_db_schema(df: pd.DataFrame) -> pd.DataFrame:
         out["Formula (-H2O)"] = ""
 
     needs_formula = "Formula" in out.columns and (
-        out["Formula (-H2O)"].isna() | (out["Formula (-H2O)"].astype(str).str.strip() == "")
+        formula_minus_na | (out["Formula (-H2O)"].astype(str).str.strip() == "")
     )
     needs_mw = out["MW (-H2O)"].isna()
 
     needs_any = needs_formula | needs_mw
 
     if "Formula" in out.columns and needs_any.any():
-        bases = []
-        waters = []
-        for f in out.loc[needs_any, "Formula"].astype(str).tolist():
-            base, water = split_hydrate_formula(f)
-            bases.append(base)
-            waters.append(water)
-
-        out.loc[needs_any, "_water_count"] = waters
+        bases, waters = split_hydrate_formulas(out.loc[needs_any, "Formula"])
+        out.loc[needs_any, "_water_count"] = waters.to_numpy()
 
         if needs_formula.any():
-            out.loc[needs_formula, "Formula (-H2O)"] = [
-                b for b, need in zip(bases, needs_any.loc[needs_any].tolist()) if need
-            ][: needs_formula.sum()]
+            pick = needs_formula[needs_any].to_numpy(dtype=bool)
+            out.loc[needs_formula, "Formula (-H2O)"] = bases.to_numpy()[pick]
     else:
         out["_water_count"] = 0
 
     # Ensure MW (-H2O)
     if needs_mw.any():
         h2o = molar_mass_h2o()
-        out.loc[needs_mw, "MW (-H2O)"] = (
-            out.loc[needs_mw, "MW"] - out.loc[needs_mw, "_water_count"].fillna(0).astype(float) * h2o
-        )
+        rows = needs_mw.to_numpy(dtype=bool)
+        mw = out["MW"].to_numpy(dtype=float, na_value=np.nan)[rows]
+        waters = out["_water_count"].to_numpy(dtype=float, na_value=np.nan)[rows]
+        out.loc[needs_mw, "MW (-H2O)"] = mw - np.nan_to_num(waters, nan=0.0) * h2o
 
     if "_water_count" in out.columns:
         out = out.drop(columns=["_water_count"])
@@ -2,50 +2,160 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from typing import Any
 from urllib.parse import quote
 
 import aiohttp
 
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+_PROPERTIES = "MolecularFormula,MolecularWeight,Title"
+_CID_URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{cids}/property/{props}/JSON"
+
+# CIDs per property request; keeps URLs well below server limits
+_CIDS_PER_REQUEST = 100
+
 
 @dataclass(slots=True, frozen=True)
 class PubchemClientConfig:
     timeout_seconds: int = 20
+    max_connections: int = 16
 
 
 @dataclass(slots=True)
 class PubChemClient:
     """
     Keeps optithor "offline-first" unless explicitly enabled by flags.
+
+    Use as an async context manager to share one HTTP session (and its
+    keep-alive connections) across many fetches; outside of one, each
+    fetch opens its own session.
     """
 
     config: PubchemClientConfig = PubchemClientConfig()
 
+    _session: aiohttp.ClientSession | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _depth: int = field(default=0, init=False, repr=False, compare=False)
+
+    def _new_session(self) -> aiohttp.ClientSession:
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout_seconds)
+        connector = aiohttp.TCPConnector(limit=self.config.max_connections)
+        return aiohttp.ClientSession(timeout=timeout, connector=connector)
+
+    async def __aenter__(self) -> PubChemClient:
+        # nested `async with` blocks share the outermost session
+        if self._depth == 0:
+            self._session = self._new_session()
+        self._depth += 1
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def fetch_many(self, cids: Iterable[str]) -> list[dict[str, Any] | None]:
+        """fetch_by_cid for each CID over one session; results follow the input order."""
+        async with self:
+            return await asyncio.gather(*(self.fetch_by_cid(c) for c in cids))
+
     async def fetch_by_cid(self, cid: str) -> dict[str, Any] | None:
         cid = str(cid).strip().removesuffix(".0")
         if not cid:
             return None
 
-        props = "MolecularFormula,MolecularWeight,Title"
-        url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{quote(cid)}/property/{props}/JSON"
-
-        timeout = aiohttp.ClientTimeout(total=self.config.timeout_seconds)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
+        url = _CID_URL.format(cids=quote(cid), props=_PROPERTIES)
+        data = await self._fetch_json(url)
+        if data is None:
+            return None
 
         props_list = data.get("PropertyTable", {}).get("Properties", [])
         if not props_list:
             return None
 
-        p0 = props_list[0]
-        # CID might come back as int/float; keep as string
-        return {
-            "PubChem CID": str(p0.get("CID", cid)).strip().removesuffix(".0"),
-            "PubChem Name": p0.get("Title"),
-            "Formula": p0.get("MolecularFormula"),
-            "MW": p0.get("MolecularWeight"),
-        }
+        return _record_from_properties(props_list[0], cid)
+
+    async def fetch_by_cids(
+        self,
+        cids: Iterable[str],
+        *,
+        batch_size: int = _CIDS_PER_REQUEST,
+        max_concurrent: int = 5,
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Fetch many CIDs with one comma-separated property request per batch.
+
+        Returns {cid: record} for the CIDs PubChem knows. CIDs missing from a batch
+        response, including every CID of a batch PubChem rejects as a whole (e.g. one
+        malformed CID), are retried one at a time through fetch_by_cid.
+        """
+        wanted = list(dict.fromkeys(str(c).strip().removesuffix(".0") for c in cids))
+        wanted = [c for c in wanted if c]
+        chunks = [wanted[i : i + batch_size] for i in range(0, len(wanted), batch_size)]
+        sem = asyncio.Semaphore(max_concurrent)
+
+        async def fetch_single(cid: str) -> dict[str, Any] | None:
+            async with sem:
+                return await self.fetch_by_cid(cid)
+
+        async def fetch_chunk(chunk: list[str]) -> list[tuple[str, dict[str, Any]]]:
+            async with sem:
+                records = await self._fetch_batch(chunk)
+            found = [(r["PubChem CID"], r) for r in records or [] if r["PubChem CID"]]
+            if len(chunk) == 1:
+                # the batch request was already the single-CID request
+                return found
+
+            got = {cid for cid, _ in found}
+            missing = [c for c in chunk if c not in got]
+            # single fetches are keyed by the CID asked for, like fetch_by_cid callers expect
+            singles = await asyncio.gather(*(fetch_single(c) for c in missing))
+            return found + [(c, r) for c, r in zip(missing, singles, strict=True) if r]
+
+        async with self:
+            batches = await asyncio.gather(*(fetch_chunk(c) for c in chunks))
+
+        return {cid: r for batch in batches for cid, r in batch}
+
+    async def _fetch_batch(self, cids: list[str]) -> list[dict[str, Any]] | None:
+        """One comma-separated property request; None if PubChem rejects it."""
+        cid_list = ",".join(quote(c) for c in cids)
+        data = await self._fetch_json(_CID_URL.format(cids=cid_list, props=_PROPERTIES))
+        if data is None:
+            return None
+        props_list = data.get("PropertyTable", {}).get("Properties", [])
+        return [_record_from_properties(p, "") for p in props_list]
+
+    async def _fetch_json(self, url: str) -> dict[str, Any] | None:
+        if self._session is not None:
+            return await self._get_json(self._session, url)
+        async with self._new_session() as session:
+            return await self._get_json(session, url)
+
+    @staticmethod
+    async def _get_json(session: aiohttp.ClientSession, url: str) -> dict[str, Any] | None:
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                return None
+            body = await resp.read()
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def _record_from_properties(p0: dict[str, Any], cid: str) -> dict[str, Any]:
+    # CID might come back as int/float; keep as string
+    return {
+        "PubChem CID": str(p0.get("CID", cid)).strip().removesuffix(".0"),
+        "PubChem Name": p0.get("Title"),
+        "Formula": p0.get("MolecularFormula"),
+        "MW": p0.get("MolecularWeight"),
+    }
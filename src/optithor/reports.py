@@ -28,6 +28,35 @@ def format_mass_and_unit(value_g_per_l: float, *, decimals: int = 2) -> tuple[fl
     return round(v * 1e9, decimals), "ng/L"
 
 
+# One tier per factor of 1000 below 1 g/L; the last tier also takes zero/negative values
+_UNIT_FLOORS = np.array([1.0, 1e-3, 1e-6, -np.inf])
+_UNIT_SCALES = np.array([1.0, 1e3, 1e6, 1e9])
+_UNIT_NAMES = np.array(["g/L", "mg/L", "µg/L", "ng/L"], dtype=object)
+
+
+def _format_mass_and_unit_array(
+    values_g_per_l: Any, *, decimals: int = 2
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    format_mass_and_unit over an array: (scaled values, units); non-finite -> (nan, "").
+    """
+    v = np.asarray(values_g_per_l, dtype=float)
+    finite = np.isfinite(v)
+    positive = finite & (v > 0)
+
+    # tier from the decade (3 decades per unit), then one exact comparison each way
+    # so log10 rounding right at 1e-3 / 1e-6 cannot pick the neighbouring unit
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tier = np.ceil(-np.log10(np.where(positive, v, 1.0)) / 3)
+    tier = np.where(positive, np.clip(tier, 0, 3), 3).astype(np.intp)
+    tier += v < _UNIT_FLOORS[tier]
+    tier -= (tier > 0) & (v >= _UNIT_FLOORS[np.maximum(tier - 1, 0)])
+
+    units = _UNIT_NAMES[tier]
+    units[~finite] = ""
+    return np.where(finite, np.round(v * _UNIT_SCALES[tier], decimals), np.nan), units
+
+
 def _scale_to_unit(value_g_per_l: float, unit: str, *, decimals: int = 2) -> float:
     """
     Scale value in g/L to a chosen unit.
@@ -72,26 +101,29 @@ def _ensure_repo_df_schema(df: pd.DataFrame) -> pd.DataFrame:
       - MW (-H2O)
 
     Also tolerates older DBs using "Molecular Weight".
+
+    Only the columns that need it are replaced; a frame that is already clean
+    (as CompoundDb returns it) comes back as-is.
     """
-    out = df.copy()
+    fixed: dict[str, pd.Series] = {}
 
-    if "PubChem CID" in out.columns:
-        out["PubChem CID"] = (
-            out["PubChem CID"]
+    if "PubChem CID" in df.columns:
+        cid = (
+            df["PubChem CID"]
             .astype(str)
             .str.strip()
             .str.replace(r"\.0$", "", regex=True)
         )
+        if not cid.equals(df["PubChem CID"]):
+            fixed["PubChem CID"] = cid
 
-    if "MW" not in out.columns and "Molecular Weight" in out.columns:
-        out["MW"] = out["Molecular Weight"]
-
-    if "MW" in out.columns:
-        out["MW"] = pd.to_numeric(out["MW"], errors="coerce")
-    if "MW (-H2O)" in out.columns:
-        out["MW (-H2O)"] = pd.to_numeric(out["MW (-H2O)"], errors="coerce")
+    mw = df["MW"] if "MW" in df.columns else df.get("Molecular Weight")
+    if mw is not None and ("MW" not in df.columns or not pd.api.types.is_numeric_dtype(mw)):
+        fixed["MW"] = pd.to_numeric(mw, errors="coerce")
+    if "MW (-H2O)" in df.columns and not pd.api.types.is_numeric_dtype(df["MW (-H2O)"]):
+        fixed["MW (-H2O)"] = pd.to_numeric(df["MW (-H2O)"], errors="coerce")
 
-    return out
+    return df.assign(**fixed) if fixed else df
 
 
 def build_selected_cids_table(
@@ -111,11 +143,8 @@ def build_selected_cids_table(
 
     Row order follows the input CID order.
     """
-    wanted = [
-        str(c).strip().removesuffix(".0")
-        for c in compound_cids
-        if str(c).strip()
-    ]
+    cid_s = pd.Series(list(compound_cids), dtype=object).astype(str).str.strip()
+    wanted = cid_s[cid_s.ne("")].str.replace(r"\.0$", "", regex=True).tolist()
     if not wanted:
         return pd.DataFrame(columns=["PubChem CID", "PubChem Name", "Formula", "MW"])
 
@@ -128,11 +157,13 @@ def build_selected_cids_table(
     cols = [c for c in ["PubChem CID", "PubChem Name", "Formula", "MW"] if c in df.columns]
     df = df[cols].copy()
 
-    wanted_index = {cid: i for i, cid in enumerate(wanted)}
-    df["_order"] = df["PubChem CID"].astype(str).map(lambda x: wanted_index.get(x, 10**9))
-    df = df.sort_values("_order", kind="mergesort").drop(columns=["_order"])
+    # a repeated CID sorts at its last position in the input; unknown CIDs go last
+    categories = pd.unique(pd.Series(wanted[::-1]))[::-1]
+    codes = pd.Categorical(df["PubChem CID"].astype(str), categories=categories).codes
+    codes = codes.astype(np.int64)
+    order = np.argsort(np.where(codes < 0, 10**9, codes), kind="stable")
 
-    return df.reset_index(drop=True)
+    return df.iloc[order].reset_index(drop=True)
 
 
 def build_compounds_results_table(
@@ -154,42 +185,67 @@ def build_compounds_results_table(
     if not result.success or not getattr(result, "compound_doses", None):
         return pd.DataFrame(columns=base_cols)
 
-    doses_df = pd.DataFrame(
-        [
+    arrays = getattr(result, "compound_dose_arrays", None)
+    if arrays is not None:
+        # columnar doses from optimize_medium: no per-dose dict round-trip
+        doses_df = pd.DataFrame(
             {
-                "PubChem CID": str(d.cid).strip(),
-                "Obtained Compound Quantity [mol/L]": float(d.mol_per_l),
-                "Obtained Compound Mass [g/L]": float(d.mass_g_per_l),
+                "PubChem CID": pd.Series(arrays.cids, dtype=object).astype(str).str.strip(),
+                "Obtained Compound Quantity [mol/L]": np.asarray(arrays.mol_per_l, dtype=float),
+                "Obtained Compound Mass [g/L]": np.asarray(arrays.mass_g_per_l, dtype=float),
             }
-            for d in result.compound_doses
-        ]
-    )
+        )
+    else:
+        doses_df = pd.DataFrame(
+            [
+                {
+                    "PubChem CID": str(d.cid).strip(),
+                    "Obtained Compound Quantity [mol/L]": float(d.mol_per_l),
+                    "Obtained Compound Mass [g/L]": float(d.mass_g_per_l),
+                }
+                for d in result.compound_doses
+            ]
+        )
 
     cids = doses_df["PubChem CID"].astype(str).tolist()
     meta_df = compound_repository.get_compounds_by_cids(cids)
     meta_df = _ensure_repo_df_schema(meta_df)
 
     keep_cols = [c for c in ["PubChem CID", "PubChem Name", "Formula", "MW", "MW (-H2O)"] if c in meta_df.columns]
-    meta_df = meta_df[keep_cols].copy()
-
-    merged = pd.merge(doses_df, meta_df, on="PubChem CID", how="left")
+    meta_df = meta_df[keep_cols].drop_duplicates(subset="PubChem CID")
+
+    # join on shared categorical codes instead of hashing CID strings; one row per dose
+    dose_cids = doses_df["PubChem CID"]
+    meta_cids = meta_df["PubChem CID"].astype(str)
+    categories = pd.api.types.union_categoricals(
+        [pd.Categorical(dose_cids), pd.Categorical(meta_cids)],
+        ignore_order=True,
+    ).categories
+    merged = pd.merge(
+        doses_df.assign(**{"PubChem CID": pd.Categorical(dose_cids, categories=categories)}),
+        meta_df.assign(**{"PubChem CID": pd.Categorical(meta_cids, categories=categories)}),
+        on="PubChem CID",
+        how="left",
+        validate="many_to_one",
+    )
+    merged["PubChem CID"] = dose_cids.to_numpy()  # left merge keeps row order
 
-    formatted = merged["Obtained Compound Mass [g/L]"].apply(
-        lambda x: pd.Series(format_mass_and_unit(x, decimals=decimals))
+    values, units = _format_mass_and_unit_array(
+        merged["Obtained Compound Mass [g/L]"], decimals=decimals
     )
-    merged["Obtained Compound Concentration"] = formatted[0]
-    merged["Unit"] = formatted[1]
+    merged["Obtained Compound Concentration"] = values
+    merged["Unit"] = units
 
     if include_anhydrous_mass and "MW (-H2O)" in merged.columns:
         merged["Obtained Compound Mass (-H2O) [g/L]"] = (
             merged["Obtained Compound Quantity [mol/L]"] * pd.to_numeric(merged["MW (-H2O)"], errors="coerce")
         )
 
-        formatted2 = merged["Obtained Compound Mass (-H2O) [g/L]"].apply(
-            lambda x: pd.Series(format_mass_and_unit(x, decimals=decimals))
+        values, units = _format_mass_and_unit_array(
+            merged["Obtained Compound Mass (-H2O) [g/L]"], decimals=decimals
         )
-        merged["Obtained Compound Concentration (-H2O)"] = formatted2[0]
-        merged["Unit (-H2O)"] = formatted2[1]
+        merged["Obtained Compound Concentration (-H2O)"] = values
+        merged["Unit (-H2O)"] = units
 
     if "MW" in merged.columns:
         merged["MW [g/mol]"] = pd.to_numeric(merged["MW"], errors="coerce").round(3)
@@ -200,9 +256,10 @@ def build_compounds_results_table(
     if include_anhydrous_mass and "Obtained Compound Concentration (-H2O)" in merged.columns:
         out_cols += ["Obtained Compound Concentration (-H2O)", "Unit (-H2O)"]
 
-    out = merged[out_cols].copy()
-    out = out.sort_values(by="Obtained Compound Concentration", ascending=False, kind="mergesort").reset_index(drop=True)
-    return out
+    # descending, ties keep dose order; NaN sorts last as with sort_values
+    key = merged["Obtained Compound Concentration"].to_numpy(dtype=float)
+    order = np.argsort(-key, kind="stable")
+    return merged[out_cols].iloc[order].reset_index(drop=True)
 
 
 def build_element_validation_table(
@@ -226,11 +283,19 @@ def build_element_validation_table(
     if not result.success or not getattr(result, "element_matches", None):
         return pd.DataFrame(columns=cols)
 
-    obtained_map = {m.element: float(m.obtained_mass_g_per_l) for m in result.element_matches}
-    required_map = {m.element: float(m.required_mass_g_per_l) for m in result.element_matches}
-    match_map = {m.element: float(m.match_percent) for m in result.element_matches}
+    arrays = getattr(result, "element_match_arrays", None)
+    if arrays is not None:
+        elements = arrays.elements.tolist()
+        obtained_map = dict(zip(elements, arrays.obtained_mass_g_per_l.tolist(), strict=True))
+        required_map = dict(zip(elements, arrays.required_mass_g_per_l.tolist(), strict=True))
+        match_map = dict(zip(elements, arrays.match_percent.tolist(), strict=True))
+    else:
+        obtained_map = {m.element: float(m.obtained_mass_g_per_l) for m in result.element_matches}
+        required_map = {m.element: float(m.required_mass_g_per_l) for m in result.element_matches}
+        match_map = {m.element: float(m.match_percent) for m in result.element_matches}
 
     rows: list[dict[str, Any]] = []
+    required_g_per_l: list[float] = []
 
     for element, req in medium_input.required_elements.items():
         y = float(req.reference_yield_g_cdw_per_g)
@@ -260,31 +325,13 @@ def build_element_validation_table(
                 "Match (%)": round(match_percent, decimals_percent),
             }
         )
+        required_g_per_l.append(required_mass)
 
     df = pd.DataFrame(rows, columns=cols)
 
-    def _back_to_g_per_l(value: float, unit: str) -> float:
-        if value is None or not np.isfinite(value):
-            return float("nan")
-        if unit == "g/L":
-            return float(value)
-        if unit == "mg/L":
-            return float(value) / 1e3
-        if unit == "µg/L":
-            return float(value) / 1e6
-        if unit == "ng/L":
-            return float(value) / 1e9
-        return float(value)
-
-    if not df.empty:
-        df["_required_g_per_l"] = [_back_to_g_per_l(v, u) for v, u in zip(df["Required Element Mass"], df["Unit"])]
-        df = (
-            df.sort_values(by="_required_g_per_l", ascending=False, kind="mergesort")
-            .drop(columns=["_required_g_per_l"])
-            .reset_index(drop=True)
-        )
-
-    return df
+    # sort on the unrounded g/L requirement, largest first
+    order = np.argsort(-np.asarray(required_g_per_l, dtype=float), kind="stable")
+    return df.iloc[order].reset_index(drop=True)
 
 
 @dataclass(frozen=True, slots=True)
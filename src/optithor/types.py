@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+import numpy as np
+
 
 @dataclass(frozen=True)
 class ElementRequirement:
@@ -30,6 +32,17 @@ class CompoundDose:
     mol_per_l: float
 
 
+@dataclass(frozen=True)
+class CompoundDoseArrays:
+    """
+    The compound doses as parallel arrays (same rows and order as compound_doses),
+    for consumers that want columns rather than one object per compound.
+    """
+    cids: np.ndarray
+    mass_g_per_l: np.ndarray
+    mol_per_l: np.ndarray
+
+
 @dataclass(frozen=True)
 class ElementMatch:
     element: str
@@ -38,6 +51,17 @@ class ElementMatch:
     match_percent: float
 
 
+@dataclass(frozen=True)
+class ElementMatchArrays:
+    """
+    The element matches as parallel arrays (same rows and order as element_matches).
+    """
+    elements: np.ndarray
+    required_mass_g_per_l: np.ndarray
+    obtained_mass_g_per_l: np.ndarray
+    match_percent: np.ndarray
+
+
 @dataclass(frozen=True)
 class MediumOptimizationResult:
     success: bool
@@ -45,3 +69,5 @@ class MediumOptimizationResult:
     compound_doses: List[CompoundDose]
     element_matches: List[ElementMatch]
     diagnostics: Optional[str] = None
+    compound_dose_arrays: CompoundDoseArrays | None = field(default=None, compare=False, repr=False)
+    element_match_arrays: ElementMatchArrays | None = field(default=None, compare=False, repr=False)
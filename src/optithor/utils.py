@@ -3,8 +3,11 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable
+from collections.abc import Iterable, Sequence
+from functools import cache, lru_cache
 
+import numpy as np
+import pandas as pd
 from chempy import Substance
 
 from .config import SolverConfig
@@ -13,14 +16,23 @@ __all__ = [
     "molar_mass",
     "molar_mass_h2o",
     "split_hydrate_formula",
+    "split_hydrate_formulas",
     "elemental_counts",
+    "elemental_count_matrix",
     "format_mass_with_unit",
     "mass_to_g_per_l",
 ]
 
 _H2O_MOLAR_MASS_FALLBACK = 18.01528
 
+# Element symbol + optional count; a single left-to-right scan, no backtracking in practice
+_FORMULA_TOKEN_RE = re.compile(r"([A-Z][a-z]?)(\d*)")
 
+# Optional water count in front of H2O in a hydrate part ("6H2O", "H2O")
+_HYDRATE_WATER_RE = re.compile(r"(?:(\d+))?H2O\b")
+
+
+@lru_cache(maxsize=4096)
 def molar_mass(formula: str) -> float:
     """Return molar mass in g/mol. Returns 0.0 if parsing fails."""
     try:
@@ -29,6 +41,7 @@ def molar_mass(formula: str) -> float:
         return 0.0
 
 
+@cache
 def molar_mass_h2o() -> float:
     """Molar mass of water (g/mol) with safe fallback."""
     mm = molar_mass("H2O")
@@ -63,7 +76,7 @@ def split_hydrate_formula(formula: str) -> tuple[str, int]:
     water_count = 0
     for part in parts[1:]:
         compact = part.replace(" ", "")
-        match = re.search(r"(?:(\d+))?H2O\b", compact)
+        match = _HYDRATE_WATER_RE.search(compact)
         if match:
             water_count = int(match.group(1)) if match.group(1) else 1
             break
@@ -71,6 +84,64 @@ def split_hydrate_formula(formula: str) -> tuple[str, int]:
     return base_formula, water_count
 
 
+def split_hydrate_formulas(formulas: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    split_hydrate_formula over a whole column: (base formulas, water counts).
+    """
+    index = formulas.index
+    s = (
+        formulas.astype(str)
+        .str.strip()
+        .str.replace("·", "•", regex=False)
+        .str.replace(".", "•", regex=False)
+        .reset_index(drop=True)
+    )
+
+    parts = s.str.split("•").explode().str.strip()
+    parts = parts[parts.ne("")]
+    pos = parts.groupby(level=0).cumcount()
+
+    # first non-empty part is the base; without one the normalized string is kept
+    bases = parts[pos.eq(0)].reindex(s.index).fillna(s)
+
+    # water count from the first later part mentioning H2O (no digits -> 1)
+    counts = parts[pos.gt(0)].str.replace(" ", "", regex=False).str.extract(r"(\d*)H2O\b")[0]
+    counts = counts.dropna().groupby(level=0).first().replace("", "1")
+    waters = pd.to_numeric(counts).reindex(s.index).fillna(0).astype(int)
+
+    bases.index = index
+    waters.index = index
+    return bases, waters
+
+
+@lru_cache(maxsize=4096)
+def _parse_formula(molecular_formula: str) -> tuple[tuple[str, int], ...]:
+    """(element, count) pairs of a formula; a repeated symbol keeps its last count."""
+    matches = _FORMULA_TOKEN_RE.findall(molecular_formula)
+    return tuple({element: int(c) if c else 1 for element, c in matches}.items())
+
+
+@lru_cache(maxsize=64)
+def _element_columns(elements: tuple[str, ...]) -> dict[str, int]:
+    """Element -> position in elements (first occurrence); shared, do not modify."""
+    columns: dict[str, int] = {}
+    for j, element in enumerate(elements):
+        columns.setdefault(element, j)
+    return columns
+
+
+@lru_cache(maxsize=8192)
+def _counts_row(molecular_formula: str, elements: tuple[str, ...]) -> tuple[int, ...]:
+    """Counts of each of elements in the formula, in elements order."""
+    row = [0] * len(elements)
+    columns = _element_columns(elements)
+    for element, n in _parse_formula(molecular_formula):
+        j = columns.get(element)
+        if j is not None:
+            row[j] = n
+    return tuple(row)
+
+
 def elemental_counts(
     molecular_formula: str,
     elements: Iterable[str] | None = None,
@@ -80,17 +151,22 @@ def elemental_counts(
 
     If elements is None, defaults are taken from SolverConfig.
     """
-    if elements is None:
-        elements = SolverConfig().elements
-
-    counts = {element: 0 for element in elements}
-    matches = re.findall(r"([A-Z][a-z]?)(\d*)", str(molecular_formula))
+    elements = tuple(SolverConfig().elements if elements is None else elements)
+    row = _counts_row(str(molecular_formula), elements)
+    return {element: row[j] for element, j in _element_columns(elements).items()}
 
-    for element, count_str in matches:
-        if element in counts:
-            counts[element] = int(count_str) if count_str else 1
 
-    return counts
+def elemental_count_matrix(
+    molecular_formulas: Iterable[str],
+    elements: Sequence[str],
+) -> np.ndarray:
+    """
+    Element counts of many formulas at once: an (n_formulas, n_elements) int array,
+    row i equal to elemental_counts(molecular_formulas[i], elements).
+    """
+    elements = tuple(elements)
+    rows = [_counts_row(str(f), elements) for f in molecular_formulas]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(elements))
 
 
 def format_mass_with_unit(value_g_per_l: float, decimals: int = 2) -> tuple[float, str]:
@@ -6,14 +6,16 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
 import math
+import re
 from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from optithor.compound_db import CompoundDb
-from optithor.utils import molar_mass_h2o, split_hydrate_formula
+from optithor.utils import molar_mass_h2o, split_hydrate_formulas
 
 
 pytestmark = pytest.mark.dbcheck
@@ -29,7 +31,8 @@ EXPECTED_COLUMNS = [
 
 # Hydrate marker used in the DB ("base • n H2O")
 # Be tolerant to both bullet variants: • and ·
-HYDRATE_REGEX = r"[•·]\s*(\d+\s*)?H2O\b"
+HYDRATE_REGEX = r"[•·]\s*(?:\d+\s*)?H2O\b"
+_HYDRATE_RE = re.compile(HYDRATE_REGEX)
 
 @dataclass
 class CheckResult:
@@ -43,31 +46,39 @@ def _fmt_bool(x: bool) -> str:
     return "PASS" if x else "FAIL"
 
 
-def _safe_str(x: Any) -> str:
-    try:
-        return str(x)
-    except Exception:
-        return repr(x)
+def _example_records(columns: dict[str, np.ndarray], rows: np.ndarray) -> list[dict[str, Any]]:
+    """Rows `rows` of parallel column arrays as plain-Python record dicts."""
+    return pd.DataFrame({k: v[rows] for k, v in columns.items()}).to_dict(orient="records")
+
+
+def _is_str_column(s: pd.Series) -> bool:
+    """Object column holding only str (astype(str) would be a no-op)."""
+    return s.dtype == object and pd.api.types.infer_dtype(s, skipna=False) == "string"
 
 
 def _coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+    # The packaged DB already arrives with float MW columns and str formulas;
+    # only the columns that are not in that shape get converted.
+    updates: dict[str, pd.Series] = {}
 
     # These should exist in the DB schema; convert defensively
-    if "PubChem CID" in out.columns:
-        out["PubChem CID"] = (
-            out["PubChem CID"].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
-        )
+    if "PubChem CID" in df.columns:
+        cid = df["PubChem CID"]
+        if not _is_str_column(cid):
+            cid = cid.astype(str)
+        cleaned = cid.str.strip().str.removesuffix(".0")
+        if not cleaned.equals(df["PubChem CID"]):
+            updates["PubChem CID"] = cleaned
 
     for col in ("MW", "MW (-H2O)"):
-        if col in out.columns:
-            out[col] = pd.to_numeric(out[col], errors="coerce")
+        if col in df.columns and not pd.api.types.is_float_dtype(df[col]):
+            updates[col] = pd.to_numeric(df[col], errors="coerce")
 
     for col in ("Formula", "Formula (-H2O)"):
-        if col in out.columns:
-            out[col] = out[col].astype(str)
+        if col in df.columns and not _is_str_column(df[col]):
+            updates[col] = df[col].astype(str)
 
-    return out
+    return df.assign(**updates) if updates else df
 
 
 def _load_db(*, force_reload: bool = False) -> pd.DataFrame:
@@ -76,11 +87,10 @@ def _load_db(*, force_reload: bool = False) -> pd.DataFrame:
 
 
 def validate_compound_db(df: pd.DataFrame) -> tuple[list[CheckResult], dict[str, Any]]:
-    df = _coerce_numeric(df)
     results: list[CheckResult] = []
     summary: dict[str, Any] = {}
 
-    # --- Schema
+    # --- Schema (checked on the raw frame: a failing DB returns before any coercion)
     cols = list(df.columns)
     missing = [c for c in EXPECTED_COLUMNS if c not in cols]
     extra = [c for c in cols if c not in EXPECTED_COLUMNS]
@@ -100,26 +110,32 @@ def validate_compound_db(df: pd.DataFrame) -> tuple[list[CheckResult], dict[str,
     if missing:
         return results, summary
 
+    df = _coerce_numeric(df)
+
     # --- Non-empty
     results.append(CheckResult("Rows: non-empty", ok=len(df) > 0, details=f"rows={len(df)}"))
 
     # --- CID uniqueness
     n_unique = df["PubChem CID"].nunique(dropna=False)
     ok_unique = (n_unique == len(df))
-    dupes = df.loc[df["PubChem CID"].duplicated(keep=False), "PubChem CID"].unique().tolist()
+    # only the first 10 duplicated CIDs are listed; the count comes from the mask
+    dupe_cids = df.loc[df["PubChem CID"].duplicated(keep=False), "PubChem CID"]
+    dupes_head = dupe_cids.drop_duplicates().head(10).tolist()
+    dupes_note = f" duplicated={dupes_head}..." if dupes_head else ""
     results.append(
         CheckResult(
             "CIDs: unique per row",
             ok=ok_unique,
-            details=f"unique={n_unique} rows={len(df)}" + (f" duplicated={dupes[:10]}..." if dupes else ""),
+            details=f"unique={n_unique} rows={len(df)}{dupes_note}",
         )
     )
     summary["cids_unique"] = int(n_unique)
-    summary["cids_duplicated_count"] = int(len(dupes))
+    summary["cids_duplicated_count"] = int(dupe_cids.nunique(dropna=False))
 
     # --- NaNs in critical columns
     critical = ["Formula", "MW", "Formula (-H2O)", "MW (-H2O)"]
-    nan_counts = {c: int(df[c].isna().sum()) for c in critical}
+    nan_series = df[critical].isna().sum()
+    nan_counts = {c: int(nan_series[c]) for c in critical}
     summary["nan_counts"] = nan_counts
 
     results.append(CheckResult("NaNs: Formula has no missing values", ok=(nan_counts["Formula"] == 0), details=f"NaNs={nan_counts['Formula']}"))
@@ -128,9 +144,19 @@ def validate_compound_db(df: pd.DataFrame) -> tuple[list[CheckResult], dict[str,
     results.append(CheckResult("NaNs: MW (-H2O) has no missing values", ok=(nan_counts["MW (-H2O)"] == 0), details=f"NaNs={nan_counts['MW (-H2O)']}"))
 
     # --- Hydrate/anhydrous split
-    is_hydrate = df["Formula"].astype(str).str.contains(HYDRATE_REGEX, regex=True, na=False)
-    df_h = df[is_hydrate].copy()
-    df_a = df[~is_hydrate].copy()
+    # literal substring scans first; the regex only confirms the few candidates
+    # _coerce_numeric leaves Formula as str-only, so no further cast is needed
+    formula = df["Formula"]
+    candidate = (
+        formula.str.contains("H2O", regex=False)
+        & (formula.str.contains("•", regex=False) | formula.str.contains("·", regex=False))
+    ).to_numpy(dtype=bool)
+    is_hydrate = np.zeros(len(df), dtype=bool)
+    confirmed = formula[candidate].str.contains(_HYDRATE_RE, na=False)
+    is_hydrate[candidate] = confirmed.to_numpy(dtype=bool)
+    # only the columns each branch reads; nothing below writes to these frames
+    df_h = df.loc[is_hydrate, EXPECTED_COLUMNS]
+    df_a = df.loc[~is_hydrate, ["MW", "MW (-H2O)"]]
 
     summary["rows_hydrate"] = int(len(df_h))
     summary["rows_anhydrous"] = int(len(df_a))
@@ -139,152 +165,158 @@ def validate_compound_db(df: pd.DataFrame) -> tuple[list[CheckResult], dict[str,
     # --- Anhydrous: MW == MW(-H2O)
     tol = 1e-6
     if len(df_a) > 0:
-        delta_a = (df_a["MW"] - df_a["MW (-H2O)"]).abs()
-        max_delta_a = float(delta_a.max())
+        delta_a = df_a["MW"].to_numpy(dtype=float) - df_a["MW (-H2O)"].to_numpy(dtype=float)
+        np.abs(delta_a, out=delta_a)
+        # fmax skips NaN like Series.max (and is NaN only if every delta is)
+        max_delta_a = float(np.fmax.reduce(delta_a))
         ok_a = bool(max_delta_a <= tol or math.isclose(max_delta_a, 0.0, abs_tol=tol))
         results.append(CheckResult("Anhydrous: MW equals MW(-H2O)", ok=ok_a, details=f"max_abs_delta={max_delta_a}"))
         summary["anhydrous_max_abs_delta_mw"] = max_delta_a
     else:
         results.append(CheckResult("Anhydrous: MW equals MW(-H2O)", ok=True, details="no anhydrous rows"))
 
-    # --- Hydrates: Formula(-H2O) matches parsed base + MW >= MW(-H2O)
+    # --- Hydrates: Formula(-H2O) matches parsed base, MW >= MW(-H2O), delta ~= n*MW(H2O)
+    # Formulas are split column-wise, the MW checks run as whole-column NumPy expressions and
+    # example dicts are only built for the reported failures.
+    h2o = float(molar_mass_h2o())
     if len(df_h) > 0:
-        bad_formula: list[dict[str, Any]] = []
-        bad_mw: list[dict[str, Any]] = []
-
-        for _, r in df_h.iterrows():
-            f = _safe_str(r["Formula"])
-            f_minus = _safe_str(r["Formula (-H2O)"])
-            base, water_count = split_hydrate_formula(f)
-
-            mw = r["MW"]
-            mw_minus = r["MW (-H2O)"]
-
-            if water_count <= 0:
-                bad_formula.append(
-                    {
-                        "CID": r["PubChem CID"],
-                        "Name": r.get("PubChem Name"),
-                        "Formula": f,
-                        "issue": "hydrate marker detected but water_count parsed as 0",
-                    }
-                )
-                continue
-
-            if f_minus.strip() != base.strip():
-                bad_formula.append(
-                    {
-                        "CID": r["PubChem CID"],
-                        "Name": r.get("PubChem Name"),
-                        "Formula": f,
-                        "Formula(-H2O)": f_minus,
-                        "expected_base": base,
-                        "water_count": water_count,
-                    }
-                )
-
-            if pd.notna(mw) and pd.notna(mw_minus) and float(mw) + tol < float(mw_minus):
-                bad_mw.append(
-                    {
-                        "CID": r["PubChem CID"],
-                        "Name": r.get("PubChem Name"),
-                        "Formula": f,
-                        "MW": float(mw),
-                        "MW(-H2O)": float(mw_minus),
-                    }
-                )
+        cid_v = df_h["PubChem CID"].to_numpy()
+        name_v = df_h["PubChem Name"].to_numpy()
+        f_v = df_h["Formula"].to_numpy()
+        f_minus_v = df_h["Formula (-H2O)"].to_numpy()
+        mw = df_h["MW"].to_numpy(dtype=float)
+        mw_minus = df_h["MW (-H2O)"].to_numpy(dtype=float)
+
+        # split each distinct formula once (salts repeat across CIDs), then broadcast back
+        codes, uniq = pd.factorize(df_h["Formula"])
+        base_u, water_u = split_hydrate_formulas(pd.Series(uniq, dtype=object))
+        bases = base_u.to_numpy()[codes]
+        wc = water_u.to_numpy(dtype=np.int64)[codes]
+
+        no_water = wc <= 0
+        base_mismatch = ~no_water & (
+            df_h["Formula (-H2O)"].str.strip().to_numpy() != base_u.str.strip().to_numpy()[codes]
+        )
+        has_mw = ~no_water & ~np.isnan(mw) & ~np.isnan(mw_minus)
+
+        bad_mw_mask = has_mw & (mw + tol < mw_minus)
+
+        observed = mw - mw_minus
+        expected = wc * h2o
+        # math.isclose(observed, expected, rel_tol=5e-3, abs_tol=0.05), elementwise
+        with np.errstate(invalid="ignore"):
+            close = (observed == expected) | (
+                np.abs(observed - expected)
+                <= np.maximum(5e-3 * np.maximum(np.abs(observed), np.abs(expected)), 0.05)
+            )
+        bad_delta_mask = has_mw & ~close
+
+        bad_formula_idx = np.flatnonzero(no_water | base_mismatch)
+        bad_mw_idx = np.flatnonzero(bad_mw_mask)
+        bad_delta_idx = np.flatnonzero(bad_delta_mask)
+
+        # examples: the first 5 failing rows of each check, sliced column-wise
+        shown = bad_formula_idx[:5]
+        bad_formula = _example_records(
+            {
+                "CID": cid_v,
+                "Name": name_v,
+                "Formula": f_v,
+                "Formula(-H2O)": f_minus_v,
+                "expected_base": bases,
+                "water_count": wc,
+            },
+            shown,
+        )
+        for k in np.flatnonzero(no_water[shown]):
+            rec = bad_formula[k]
+            bad_formula[k] = {
+                "CID": rec["CID"],
+                "Name": rec["Name"],
+                "Formula": rec["Formula"],
+                "issue": "hydrate marker detected but water_count parsed as 0",
+            }
+        bad_mw = _example_records(
+            {"CID": cid_v, "Name": name_v, "Formula": f_v, "MW": mw, "MW(-H2O)": mw_minus},
+            bad_mw_idx[:5],
+        )
+        bad_delta = _example_records(
+            {
+                "CID": cid_v,
+                "Name": name_v,
+                "Formula": f_v,
+                "water_count": wc,
+                "observed_delta": observed,
+                "expected_delta": expected,
+            },
+            bad_delta_idx[:5],
+        )
 
         results.append(
             CheckResult(
                 "Hydrates: Formula(-H2O) matches base formula",
-                ok=(len(bad_formula) == 0),
-                details=f"bad_rows={len(bad_formula)}",
-                extras={"examples": bad_formula[:5]} if bad_formula else None,
+                ok=(len(bad_formula_idx) == 0),
+                details=f"bad_rows={len(bad_formula_idx)}",
+                extras={"examples": bad_formula} if bad_formula else None,
             )
         )
         results.append(
             CheckResult(
                 "Hydrates: MW >= MW(-H2O)",
-                ok=(len(bad_mw) == 0),
-                details=f"bad_rows={len(bad_mw)}",
-                extras={"examples": bad_mw[:5]} if bad_mw else None,
+                ok=(len(bad_mw_idx) == 0),
+                details=f"bad_rows={len(bad_mw_idx)}",
+                extras={"examples": bad_mw} if bad_mw else None,
             )
         )
-
-        summary["hydrate_bad_formula_count"] = int(len(bad_formula))
-        summary["hydrate_bad_mw_count"] = int(len(bad_mw))
-    else:
-        results.append(CheckResult("Hydrates: Formula(-H2O) matches base formula", ok=True, details="no hydrate rows"))
-        results.append(CheckResult("Hydrates: MW >= MW(-H2O)", ok=True, details="no hydrate rows"))
-
-    # --- Hydrates: delta ~= n*MW(H2O)
-    h2o = float(molar_mass_h2o())
-    if len(df_h) > 0:
-        bad_delta: list[dict[str, Any]] = []
-        for _, r in df_h.iterrows():
-            f = _safe_str(r["Formula"])
-            _, water_count = split_hydrate_formula(f)
-            mw = r["MW"]
-            mw_minus = r["MW (-H2O)"]
-
-            if water_count <= 0 or pd.isna(mw) or pd.isna(mw_minus):
-                continue
-
-            expected = water_count * h2o
-            observed = float(mw) - float(mw_minus)
-
-            if not math.isclose(observed, expected, rel_tol=5e-3, abs_tol=0.05):
-                bad_delta.append(
-                    {
-                        "CID": r["PubChem CID"],
-                        "Name": r.get("PubChem Name"),
-                        "Formula": f,
-                        "water_count": water_count,
-                        "observed_delta": observed,
-                        "expected_delta": expected,
-                    }
-                )
-
         results.append(
             CheckResult(
                 "Hydrates: MW - MW(-H2O) ~= n*MW(H2O)",
-                ok=(len(bad_delta) == 0),
-                details=f"bad_rows={len(bad_delta)}",
-                extras={"examples": bad_delta[:5]} if bad_delta else None,
+                ok=(len(bad_delta_idx) == 0),
+                details=f"bad_rows={len(bad_delta_idx)}",
+                extras={"examples": bad_delta} if bad_delta else None,
             )
         )
-        summary["hydrate_bad_delta_count"] = int(len(bad_delta))
+
+        summary["hydrate_bad_formula_count"] = int(len(bad_formula_idx))
+        summary["hydrate_bad_mw_count"] = int(len(bad_mw_idx))
+        summary["hydrate_bad_delta_count"] = int(len(bad_delta_idx))
     else:
+        results.append(CheckResult("Hydrates: Formula(-H2O) matches base formula", ok=True, details="no hydrate rows"))
+        results.append(CheckResult("Hydrates: MW >= MW(-H2O)", ok=True, details="no hydrate rows"))
         results.append(CheckResult("Hydrates: MW - MW(-H2O) ~= n*MW(H2O)", ok=True, details="no hydrate rows"))
 
     return results, summary
 
 
 def print_db_report(results: list[CheckResult], summary: dict[str, Any]) -> None:
-    print("\n" + "=" * 72)
-    print("OptiThor compound_db validation report")
-    print("=" * 72)
-    print(f"Total rows: {summary.get('rows_total')}")
-    print(f"Hydrate rows: {summary.get('rows_hydrate')} | Anhydrous rows: {summary.get('rows_anhydrous')}")
-    print(f"Unique CIDs: {summary.get('cids_unique')} | Duplicated CIDs: {summary.get('cids_duplicated_count')}")
-    print(f"NaNs: {summary.get('nan_counts')}")
+    # collected first and written with a single print call
+    lines = [
+        "",
+        "=" * 72,
+        "OptiThor compound_db validation report",
+        "=" * 72,
+        f"Total rows: {summary.get('rows_total')}",
+        f"Hydrate rows: {summary.get('rows_hydrate')} | Anhydrous rows: {summary.get('rows_anhydrous')}",
+        f"Unique CIDs: {summary.get('cids_unique')} | Duplicated CIDs: {summary.get('cids_duplicated_count')}",
+        f"NaNs: {summary.get('nan_counts')}",
+    ]
     if "anhydrous_max_abs_delta_mw" in summary:
-        print(f"Anhydrous max |MW - MW(-H2O)|: {summary.get('anhydrous_max_abs_delta_mw')}")
+        lines.append(f"Anhydrous max |MW - MW(-H2O)|: {summary.get('anhydrous_max_abs_delta_mw')}")
 
-    print("\nChecks:")
+    lines.append("\nChecks:")
     for r in results:
         line = f"  [{_fmt_bool(r.ok)}] {r.name}"
         if r.details:
             line += f" - {r.details}"
-        print(line)
+        lines.append(line)
         if (not r.ok) and r.extras and r.extras.get("examples"):
-            print("        examples:")
-            for item in r.extras["examples"]:
-                print(f"          - {item}")
+            lines.append("        examples:")
+            lines.extend(f"          - {item}" for item in r.extras["examples"])
 
     ok_all = all(r.ok for r in results)
-    print("\nOverall:", "PASS" if ok_all else "FAIL")
-    print("=" * 72 + "\n")
+    lines.append("\nOverall: " + ("PASS" if ok_all else "FAIL"))
+    lines.append("=" * 72 + "\n")
+    print("\n".join(lines))
 
 
 def test_compound_db_report() -> None:
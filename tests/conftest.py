@@ -0,0 +1,11 @@
+# tests/conftest.py
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# run against the source tree without installing the package
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT / "src"))
+# the DB builder steps import each other as top-level modules
+sys.path.insert(0, str(_ROOT / "compound_db_builder"))
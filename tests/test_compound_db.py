@@ -0,0 +1,103 @@
+# tests/test_compound_db.py
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from optithor import CompoundDb, compound_db
+from optithor.paths import default_db_path, packaged_db_path
+from optithor.pubchem_client import PubChemClient
+
+_NEW_CID = "999999999"
+
+
+class OfflinePubChem(PubChemClient):
+    """Answers every CID locally, so a fetch on a lookup miss needs no network."""
+
+    async def _fetch_batch(self, cids: list[str]) -> list[dict[str, Any]] | None:
+        return [
+            {"PubChem CID": c, "PubChem Name": "test salt", "Formula": "NaCl", "MW": 58.44}
+            for c in cids
+        ]
+
+
+@pytest.fixture
+def cache_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path
+
+
+def _db_with_hydrate_gaps(path: Path) -> Path:
+    """The packaged DB with a blank Formula (-H2O) and a NaN MW (-H2O) to derive."""
+    df = pd.read_parquet(packaged_db_path())
+    df.loc[0, "Formula (-H2O)"] = None
+    df.loc[1, "MW (-H2O)"] = np.nan
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, index=False)
+    return path
+
+
+def _snapshot(path: Path) -> tuple[int, bytes]:
+    return path.stat().st_mtime_ns, path.read_bytes()
+
+
+def _load_and_fetch(repo: CompoundDb) -> None:
+    repo.load()
+    hit = repo.get_compounds_by_cids([_NEW_CID, "5793"], fetch_missing=True, update_cache=True)
+    assert _NEW_CID in hit["PubChem CID"].tolist()
+
+
+@pytest.mark.usefixtures("cache_home")
+def test_read_only_never_writes_the_cache_db() -> None:
+    db = _db_with_hydrate_gaps(default_db_path())
+    before = _snapshot(db)
+
+    _load_and_fetch(CompoundDb(read_only=True, pubchem=OfflinePubChem()))
+
+    assert _snapshot(db) == before
+
+
+def test_read_only_never_writes_a_user_db(cache_home: Path) -> None:
+    db = _db_with_hydrate_gaps(cache_home / "user" / "compounds.parquet")
+    before = _snapshot(db)
+
+    _load_and_fetch(CompoundDb(path=db, read_only=True, pubchem=OfflinePubChem()))
+
+    assert _snapshot(db) == before
+
+
+@pytest.mark.usefixtures("cache_home")
+def test_read_only_without_cache_reads_the_packaged_db_in_place() -> None:
+    packaged = packaged_db_path()
+    before = _snapshot(packaged)
+
+    _load_and_fetch(CompoundDb(read_only=True, pubchem=OfflinePubChem()))
+
+    assert _snapshot(packaged) == before
+    assert not default_db_path().exists()
+
+
+def test_lookup_is_shared_across_cid_orders(
+    cache_home: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    full_scans: list[int] = []
+    rows_for_cids = compound_db._rows_for_cids
+
+    def counting(df: pd.DataFrame, cid_index: pd.Index, wanted: list[str]) -> pd.DataFrame:
+        if df is repo._cached_df:
+            full_scans.append(len(wanted))
+        return rows_for_cids(df, cid_index, wanted)
+
+    monkeypatch.setattr(compound_db, "_rows_for_cids", counting)
+    repo = CompoundDb(path=packaged_db_path(), read_only=True)
+
+    first = repo.get_compounds_by_cids(["5793", "1001", "10214"])
+    second = repo.get_compounds_by_cids(["10214", "5793", "1001", "5793"])
+
+    assert full_scans == [3]
+    assert first["PubChem CID"].tolist() == ["5793", "1001", "10214"]
+    assert second["PubChem CID"].tolist() == ["10214", "5793", "1001"]
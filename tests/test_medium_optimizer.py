@@ -0,0 +1,75 @@
+# tests/test_medium_optimizer.py
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from optithor import optimize_medium, optimize_medium_batch
+from optithor.errors import DataError
+from optithor.types import ElementRequirement, MediumOptimizationInput
+
+_COMPOUNDS = pd.DataFrame(
+    {
+        "PubChem CID": ["5793", "25517"],
+        "PubChem Name": ["D-Glucose", "Ammonium chloride"],
+        "Formula": ["C6H12O6", "ClH4N"],
+        "Formula (-H2O)": ["C6H12O6", "ClH4N"],
+        "MW": [180.16, 53.49],
+        "MW (-H2O)": [180.16, 53.49],
+    }
+)
+
+
+class FrameRepository:
+    """Stands in for CompoundDb: serves the rows of a fixed frame by CID."""
+
+    def get_compounds_by_cids(self, cids: list[str]) -> pd.DataFrame:
+        return _COMPOUNDS[_COMPOUNDS["PubChem CID"].isin(cids)].reset_index(drop=True)
+
+
+def _medium(
+    biomass_g_per_l: float, elements: tuple[str, ...] = ("C", "N")
+) -> MediumOptimizationInput:
+    return MediumOptimizationInput(
+        compound_cids=["5793", "25517"],
+        max_dry_biomass_g_per_l=biomass_g_per_l,
+        required_elements={
+            e: ElementRequirement(reference_yield_g_cdw_per_g=1.0, excess_factor=1.0)
+            for e in elements
+        },
+    )
+
+
+def _glucose_dose(result) -> float:
+    return next(d.mass_g_per_l for d in result.compound_doses if d.cid == "5793")
+
+
+def test_batch_results_follow_input_order() -> None:
+    repo = FrameRepository()
+    biomasses = [4.0, 1.0, 3.0, 2.0]
+
+    results = optimize_medium_batch([_medium(b) for b in biomasses], repo, max_workers=4)
+
+    assert [r.success for r in results] == [True] * len(biomasses)
+    single = [optimize_medium(_medium(b), repo) for b in biomasses]
+    assert [_glucose_dose(r) for r in results] == pytest.approx([_glucose_dose(r) for r in single])
+    # carbon is the binding element: the glucose dose scales with the biomass target
+    doses = [_glucose_dose(r) for r in results]
+    per_gram = [d / b for d, b in zip(doses, biomasses, strict=True)]
+    assert per_gram == pytest.approx([per_gram[0]] * len(biomasses))
+
+
+def test_batch_reports_a_failing_medium_in_its_own_slot() -> None:
+    repo = FrameRepository()
+    inputs = [_medium(1.0), _medium(1.0, ("C", "Xx")), _medium(2.0)]
+
+    with pytest.raises(DataError):
+        optimize_medium(inputs[1], repo)
+
+    results = optimize_medium_batch(inputs, repo)
+
+    assert len(results) == 3
+    assert [r.success for r in results] == [True, False, True]
+    assert "Xx" in results[1].message
+    assert results[1].compound_doses == []
+    assert _glucose_dose(results[2]) == pytest.approx(2 * _glucose_dose(results[0]))
@@ -0,0 +1,51 @@
+# tests/test_pubchem_cache.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import io_json
+import numpy as np
+import pandas as pd
+import pytest
+from pubchem_cache import load_cache, save_cache
+
+
+def _reject_constant(token: str) -> None:
+    raise ValueError(f"non-standard JSON token: {token}")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "stdlib"])
+def test_save_cache_writes_strict_json(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_orjson: bool
+) -> None:
+    if not use_orjson:
+        monkeypatch.setattr(io_json, "orjson", None)
+    elif io_json.orjson is None:
+        pytest.skip("orjson not installed")
+    df = pd.DataFrame(
+        {
+            "Query Name": ["glucose", "nothing"],
+            "Status": ["ok", "not_found"],
+            "PubChem CID": ["5793", None],
+            "Molecular Weight": [180.16, np.nan],
+            "SMILES": [np.nan, np.nan],
+        }
+    )
+
+    path = save_cache(tmp_path / "calls.json", df)
+
+    records = json.loads(path.read_text(encoding="utf-8"), parse_constant=_reject_constant)
+    assert records[1] == {
+        "Query Name": "nothing",
+        "Status": "not_found",
+        "PubChem CID": None,
+        "Molecular Weight": None,
+        "SMILES": None,
+    }
+    assert records[0]["Molecular Weight"] == 180.16
+
+    loaded, attempted = load_cache(path)
+    assert attempted == {"glucose", "nothing"}
+    assert loaded["PubChem CID"].tolist()[0] == "5793"
+    assert loaded["Molecular Weight"].isna().tolist() == [False, True]
@@ -0,0 +1,109 @@
+# tests/test_pubchem_client.py
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+from urllib.parse import unquote
+
+from optithor.pubchem_client import PubChemClient
+
+
+def _url_cids(url: str) -> list[str]:
+    return unquote(url.split("/cid/", 1)[1].split("/property/", 1)[0]).split(",")
+
+
+class FakePubChem(PubChemClient):
+    """Answers property requests locally; a request naming a 'bad' CID is rejected whole."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[list[str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _fetch_json(self, url: str) -> dict[str, Any] | None:
+        cids = _url_cids(url)
+        self.requests.append(cids)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if any(c.startswith("bad") for c in cids):
+            return None
+        props = [
+            {
+                "CID": int(c),
+                "Title": f"compound {c}",
+                "MolecularFormula": "H2O",
+                "MolecularWeight": "18.015",
+            }
+            for c in cids
+        ]
+        return {"PropertyTable": {"Properties": props}}
+
+
+def test_fetch_by_cids_batches_of_100() -> None:
+    client = FakePubChem()
+    cids = [str(i) for i in range(1, 251)]
+
+    got = asyncio.run(client.fetch_by_cids(cids, max_concurrent=5))
+
+    assert sorted(len(r) for r in client.requests) == [50, 100, 100]
+    assert sorted(got) == sorted(cids)
+    assert got["42"]["PubChem Name"] == "compound 42"
+
+
+def test_fetch_by_cids_respects_max_concurrent() -> None:
+    client = FakePubChem()
+    cids = [str(i) for i in range(1, 1001)]
+
+    asyncio.run(client.fetch_by_cids(cids, batch_size=10, max_concurrent=3))
+
+    assert len(client.requests) == 100
+    assert 1 < client.max_in_flight <= 3
+
+
+def test_rejected_batch_falls_back_to_single_cids() -> None:
+    client = FakePubChem()
+    cids = ["1", "2", "bad", "3"]
+
+    got = asyncio.run(client.fetch_by_cids(cids, max_concurrent=2))
+
+    assert client.requests[0] == cids
+    assert sorted(client.requests[1:]) == [["1"], ["2"], ["3"], ["bad"]]
+    assert sorted(got) == ["1", "2", "3"]
+
+
+def test_cids_missing_from_a_batch_are_fetched_one_at_a_time() -> None:
+    class PartialClient(FakePubChem):
+        async def _fetch_batch(self, cids: list[str]) -> list[dict[str, Any]] | None:
+            records = await super()._fetch_batch(cids)
+            return [r for r in records or [] if r["PubChem CID"] != "2"]
+
+    client = PartialClient()
+
+    got = asyncio.run(client.fetch_by_cids(["1", "2", "3"]))
+
+    assert client.requests == [["1", "2", "3"], ["2"]]
+    assert sorted(got) == ["1", "2", "3"]
+
+
+def test_fetch_batch_override_replaces_the_http_request() -> None:
+    class MirrorClient(PubChemClient):
+        async def _fetch_batch(self, cids: list[str]) -> list[dict[str, Any]] | None:
+            return [
+                {"PubChem CID": c, "PubChem Name": "mirror", "Formula": "NaCl", "MW": 58.44}
+                for c in cids
+                if c != "404"
+            ]
+
+        async def _fetch_json(self, url: str) -> dict[str, Any] | None:
+            raise AssertionError(f"unexpected HTTP request: {url}")
+
+        async def fetch_by_cid(self, cid: str) -> dict[str, Any] | None:
+            return None
+
+    got = asyncio.run(MirrorClient().fetch_by_cids(["5793", "404", "4873"]))
+
+    assert sorted(got) == ["4873", "5793"]
+    assert got["5793"]["PubChem Name"] == "mirror"